@@ -25,26 +25,45 @@ Single Cycle Waveform Editor:
 http://scw.sheetsofsound.com/editor.html
 
 '''
-from math import pi, sin, cos, asin, sqrt, ceil
+from math import pi, sin, cos, asin, sqrt, ceil, log2
 import wave
-import struct
+import io
 import os
 import shutil
 import random
-
-# only needed for signal design and debugging
-from scipy.io.wavfile import read
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import cProfile
+import collections
+import contextlib
+import csv
+import functools
+import queue
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+import hashlib
+import http.server
+import inspect
+import json
+import urllib.parse
+import numpy as np
 
 ###################################
 # Global Variables/Constants
 ###################################
 digiProNum = 0
+renderCache = collections.OrderedDict() # render_key: samples, least recently used first
+renderCacheStats = {'renders': 0, 'saved': 0, 'bytes': 0}
 baseEpoch = 315532800
 epochInc = 31536000
 spacer = '\n█████████████████████████████████████████████████████████████████████████████████████████████████████████\n'
 addendumPath = 'userFiles'
 uniPath = 'Unison Waves'
+mipmapPath = 'Mipmaps'
 
 ##########################################
 # Generation Controls & Chord Defintions
@@ -61,6 +80,23 @@ genCustomInversions = 1
 genUp1Octave = 0 
 appendUserFilesFlag = 0
 printGraphsFlag = 0
+graphFormat = 'png' # with printGraphsFlag on: 'png' or 'svg' saves one contact sheet per bank into /graphs/ without needing a display, 'show' opens the old interactive matplotlib windows
+digiProExport = 0 # 1 also writes each oscillator's bank straight to a DigiPro .syx file (osc_saw.syx) in slot order
+digiProReference = '' # a .syx of waves sent from C6, the DigiPro export refuses to run until it can rebuild every message in it byte for byte
+incrementalBuild = 0 # 1 keeps the oscillator folders between runs and only re-renders the files whose chord, oscillator or settings changed
+renderCacheMB = 64 # size limit of the in-memory cache that serves repeated chord loops instead of rendering them again, 0 turns it off
+writerThreads = 2 # background threads that write the rendered files while the next ones render, 0 writes each file before rendering the next
+writeQueueSize = 16 # most rendered loops allowed to wait for the writer threads at once
+workerProcesses = 1 # 1 renders everything in order on this process, 0 uses every core, any other number sets how many processes render at once
+renderEngine = 'vector' # 'vector' renders each chord as one numpy array expression, 'spectral' builds the additive waves with one inverse fft, 'scalar' is the original sample by sample reference
+gainMode = 'off' # 'peak' or 'rms' turns every loop up or down to gainLevel after it's rendered, 'off' leaves the chords mixed at 1/number of notes
+gainScope = 'chord' # 'chord' sets each loop's level on its own, 'bank' turns the whole bank by one amount so its loudest loop lands on gainLevel
+gainLevel = -0.3 # dBFS the gain stage aims for, -0.3 is a good peak level, something like -12 for rms
+softClip = 0 # 1 rounds off anything that gets near full scale instead of hard clipping it, useful with rms levels
+dither = 0 # 1 adds triangular (TPDF) dither when the loops are rounded to 16 bit
+wavetableExport = 0 # 1 also packs every bank into one memory mapped wavetable file (osc_saw.wt) of wavetableFrameLength sample frames
+wavetableFrameLength = 2048
+mipmapOctaves = 0 # for samplers that play the waves at more than one pitch: 1 or more also writes each chord as a wavetable in /Mipmaps/ with one band limited level per octave up, 0 doesn't
 
 
 oscList = [
@@ -92,7 +128,7 @@ oscList = [
 
 #['chord name', [the just intonic ratios of the chord],[inversions you want to generate. Ex. generate 1st and 3rd inversions: "[1,3]" ]
 #['chord name', [the just intonic ratios of the chord],[inversions you want to generate. Ex. generate 1st and 3rd inversions: "[1,3]" ]
-chords = [
+mainChords = [
 #major chords
 ['maj', [4,5,6],             []],             # major
 ['mj7', [8,10,12,15],        [1,2,3]],  # major7 3rd inversion is F/E
@@ -167,71 +203,84 @@ chords = [
 
 
 #second chords array for the second machine type. This will fewer more common/standard chords, but genereate all of their inversions.
-if altChordsFlag == 1:
-    chords = [
-    #major chords
-    ['maj', [4,5,6],             [1,2]],             # major
-    ['mj7', [8,10,12,15],        [1,2,3]],           # major7 3rd inversion is F/E
-    ['mj9', [8,10,12,15,18],     [1,2,3,4]],         # major9
-    ['Mj11', [8,10,12,15,18,23],  []],               # major7
-    
-    #minor chords
-    ['min', [10,12,15],          [1,2]],             # C
-    ['mn7', [10,12,15,18],       [1,2,3]],           # C minor chord
-    ['mn9', [10,12,15,18,23],    [1,2,3,4]],         # true C minor 9
-    ['mn11', [10,12,15,18,23,27], []],               # true C minor 9 add f octave C,Eb,G,Bb,f
-    
-    #sus2 chords
-    ['su2', [8,9,12],            [1,2]],             #  sus2
-    ['s2+', [4,5,6,8,9],         [1,3]],             # csus 2 +c octave + inverted d
-    ['s2x1', [8,9,12,16,18],[]],                     # C4,D4,G4,C5,D5
-    ['s2x2',[16,19,21,24],[]],                       # C7sus2/G  also [6,7,8,9] 
-
-    #sus4 chords 
-    ['su4', [6,8,9],[1,2]],                   # sus4
-    ['s4+', [6,9,12,16,18],[1,3]],            # Nice open sus 4 chord  C4,G4,C5,F5,G5
-    ['s4x1', [6,8,9,12,16,24],[]],          # C4,F4,G4,C5,F5,C6
-    ['s4x2',[15,18,20,27],[]],             # C7sus4/G aka C7sus4 inverted on G
-    
-    #diminished chords
-    ['dim', [5,6,7],[1]],                   # perfect diminished
-    ['di7', [10,12,14,17],[2]],             # Francois-Joseph Fetis dim (17-limit tuning)(idk what this is) B3+D4+F4+Ab4
-    
-    #Augmented chords
-    ['aug',[16,20,25],[2]],                #C,E,G#
-    ['au7',[16,20,25,28],[3]],             #C,E,G#,Bb
-        
-    #Number/other Chords
-    ['7#11',[8,10,12,15,23],[2]],              #Cmaj7#11 C4,E4,G4,B4,F#5
-    ['7b5', [5,6,7,9], [2]],         # Cmin7b5 (half-diminished) Used in Black Cow by Steely Dan
-    ['6  ', [12,15,18,20], [2] ],                #C6 C,E,G,A     third inversion is F/D
-    ['5+6', [6,9,10], [2] ],               #C5 add 6 C,G,A
-    ['7  ', [4,5,6,7], [1,2] ],              # C7 (harmonic 7)
-    ['9  ', [4,5,6,7,9], [] ],            # C9 (harmonic 9)
-    ['4¥5', [6,9,10,12,16],[]],            #F/G with a C bass note monomachine turns ¥ into a percent sign (closests to slash I could find)
-
-    # Unison notes. You can generate any combination desired. 1=C4,2=C5,4=C6,
-    ['uni', [8], [] ],
-    #['uni2', [1,16], [] ],       
+altChords = [
+#major chords
+['maj', [4,5,6],             [1,2]],             # major
+['mj7', [8,10,12,15],        [1,2,3]],           # major7 3rd inversion is F/E
+['mj9', [8,10,12,15,18],     [1,2,3,4]],         # major9
+['Mj11', [8,10,12,15,18,23],  []],               # major7
+
+#minor chords
+['min', [10,12,15],          [1,2]],             # C
+['mn7', [10,12,15,18],       [1,2,3]],           # C minor chord
+['mn9', [10,12,15,18,23],    [1,2,3,4]],         # true C minor 9
+['mn11', [10,12,15,18,23,27], []],               # true C minor 9 add f octave C,Eb,G,Bb,f
+
+#sus2 chords
+['su2', [8,9,12],            [1,2]],             #  sus2
+['s2+', [4,5,6,8,9],         [1,3]],             # csus 2 +c octave + inverted d
+['s2x1', [8,9,12,16,18],[]],                     # C4,D4,G4,C5,D5
+['s2x2',[16,19,21,24],[]],                       # C7sus2/G  also [6,7,8,9] 
+
+#sus4 chords 
+['su4', [6,8,9],[1,2]],                   # sus4
+['s4+', [6,9,12,16,18],[1,3]],            # Nice open sus 4 chord  C4,G4,C5,F5,G5
+['s4x1', [6,8,9,12,16,24],[]],          # C4,F4,G4,C5,F5,C6
+['s4x2',[15,18,20,27],[]],             # C7sus4/G aka C7sus4 inverted on G
+
+#diminished chords
+['dim', [5,6,7],[1]],                   # perfect diminished
+['di7', [10,12,14,17],[2]],             # Francois-Joseph Fetis dim (17-limit tuning)(idk what this is) B3+D4+F4+Ab4
+
+#Augmented chords
+['aug',[16,20,25],[2]],                #C,E,G#
+['au7',[16,20,25,28],[3]],             #C,E,G#,Bb
     
-    ]
+#Number/other Chords
+['7#11',[8,10,12,15,23],[2]],              #Cmaj7#11 C4,E4,G4,B4,F#5
+['7b5', [5,6,7,9], [2]],         # Cmin7b5 (half-diminished) Used in Black Cow by Steely Dan
+['6  ', [12,15,18,20], [2] ],                #C6 C,E,G,A     third inversion is F/D
+['5+6', [6,9,10], [2] ],               #C5 add 6 C,G,A
+['7  ', [4,5,6,7], [1,2] ],              # C7 (harmonic 7)
+['9  ', [4,5,6,7,9], [] ],            # C9 (harmonic 9)
+['4¥5', [6,9,10,12,16],[]],            #F/G with a C bass note monomachine turns ¥ into a percent sign (closests to slash I could find)
+
+# Unison notes. You can generate any combination desired. 1=C4,2=C5,4=C6,
+['uni', [8], [] ],
+#['uni2', [1,16], [] ],       
 
+]
+
+chords = altChords if altChordsFlag == 1 else mainChords
 
-if normalizeChords == 1:
-    for chord in chords:
+
+# raises every chord whose base ratio is below 8 one octave so they all play in the same relative octave as the minor chord.
+# returns a new chord array, the one passed in is left alone
+def normalize_chords(chordList, verbose=False):
+    normalized = []
+    for chord in chordList:
         ratios = chord[1]
         baseRatio = chord[1][0]
         if len(ratios) == 1 or ratios[0] == 1: #unique case for unison waves
+            normalized.append(chord)
             continue
         if baseRatio < 8:
-            chord[1] = [partialRatio*2 for partialRatio in ratios]
-            print(chord[0] + ' raised 1 octave')
-print('Normalized Chord Array:'+str(chords))
+            chord = [chord[0], [partialRatio*2 for partialRatio in ratios]] + chord[2:]
+            if verbose:
+                print(chord[0] + ' raised 1 octave')
+        normalized.append(chord)
+    return normalized
+
+# the chord array the current settings generate
+def active_chords():
+    if normalizeChords == 1:
+        return normalize_chords(chords)
+    return chords
 
 #####################
 # Signal Definitions
 #####################
-#a quick note, if you plan on designing a new wave type, it cannot return a value larger than 1, else the wav file cannot be written
+#a quick note, if you plan on designing a new wave type, keep it between -1 and 1. anything larger gets clipped when the wav file is written
 class oscillators(object):
     def osc_sine(x, partials):
       return sin(x)
@@ -392,61 +441,618 @@ class oscillators(object):
             clippedSignal = max
         return clippedSignal
 
+# array versions of the oscillators above. each one takes a whole phase array x and returns an array of samples.
+# the math is kept in the same order as the scalar versions so both engines write the exact same .wav files,
+# the scalar class stays as the reference path (see compare_engines)
+def _harmonic_sum(x, first, last, partials, oddOnly=False):
+    k = pi/2/partials
+    v = 0.0
+    for n in range(first,last):
+        if oddOnly and n%2==0: continue
+        m = cos((n-1)*k)
+        m *= m
+        v = v + np.sin(n*x)/n * m # reduce amplitude of higher partials to minimize Gibbs effect
+    return v + np.zeros_like(x)
+
+# the array versions of the oscillators are declared as small graphs instead of code. X is the phase array, P the partials
+# limit, and arithmetic on nodes builds more nodes, so a graph reads just like the formula it stands for. nodes are plain
+# tuples ('op', args...), so two identical sub-expressions are the same node and compile_graph only works them out once
+class oscNode(tuple):
+    def __new__(cls, op, *args):
+        return tuple.__new__(cls, (op,) + args)
+
+    def __add__(self, other): return oscNode('add', self, other)
+    def __radd__(self, other): return oscNode('add', other, self)
+    def __sub__(self, other): return oscNode('sub', self, other)
+    def __rsub__(self, other): return oscNode('sub', other, self)
+    def __mul__(self, other): return oscNode('mul', self, other)
+    def __rmul__(self, other): return oscNode('mul', other, self)
+    def __truediv__(self, other): return oscNode('div', self, other)
+    def __rtruediv__(self, other): return oscNode('div', other, self)
+    def __pow__(self, other): return oscNode('pow', self, other)
+    def __neg__(self): return oscNode('neg', self)
+
+X = oscNode('x')
+P = oscNode('partials')
+
+def node_sin(a): return oscNode('sin', a)
+def node_cos(a): return oscNode('cos', a)
+def node_asin(a): return oscNode('asin', a)
+def node_clip(a, low=-1, high=1): return oscNode('clip', a, low, high)
+
+# tapered sum of harmonics first up to (not including) last, or up to the partials limit if last is None
+def harmonics(first, last=None, oddOnly=False, x=X):
+    return oscNode('harmonics', x, first, last, oddOnly, P)
+
+# a carrier at wc times the note, phase modulated by kw times a sine at wm times the note
+def fm(wc, kw, wm, x=X):
+    return node_sin(wc*x + kw*node_sin(wm*x))
+
+# the sine in a sine in a sine at half speed behind gtar, bell, bzzy & org, y sets the innermost speed
+def nested_sine(y):
+    h = X/2
+    return node_sin((2*h + node_sin(33 + node_sin(y*h))) + 2.13)
+
+def noise(x=X): # same random stream as the scalar version
+    return oscNode('noise', x)
+
+graphOps = {
+    'add': np.add, 'sub': np.subtract, 'mul': np.multiply, 'div': np.true_divide, 'pow': np.power, 'neg': np.negative,
+    'sin': np.sin, 'cos': np.cos, 'asin': np.arcsin, 'clip': np.clip,
+    'harmonics': lambda x, first, last, oddOnly, partials: _harmonic_sum(x, first, partials if last is None else last, partials, oddOnly),
+    'noise': lambda x: np.array([random.uniform(-1, 1) for _ in range(np.size(x))]).reshape(np.shape(x)),
+}
+
+oscGraphs = {
+    'osc_sine': node_sin(X),
+    'osc_tri':  .63 * node_asin(node_sin(X)),
+    'osc_saw':  harmonics(1) / 2,
+    'osc_saw2': 2*(harmonics(2, 4) / 2),
+    'osc_sqr':  harmonics(1, oddOnly=True),
+    'osc_5th':  2*harmonics(2, 6, oddOnly=True),
+    'osc_fm1':  fm(3, 4.8, 2),
+    'osc_fm':   fm(1, 1.6, 3),
+    'osc_chor': harmonics(1, 3) / 2,
+    'osc_voic': harmonics(1, 6) / 2,
+    'osc_flut': harmonics(1, 4, oddOnly=True),
+    'osc_whis': harmonics(1, 3, oddOnly=True),
+    'osc_tsp':  node_clip(0.78*(node_asin(node_cos(X/2 - 0.463))**2) - 1.0002),
+    'osc_trum': (node_sin(1+2*X+node_sin(1+X+node_sin(X)))+node_sin(X))/2,
+    'osc_tuba': (node_sin(1+2*X+node_sin(-1+X+node_sin(X)))+node_sin(X))/2,
+    'osc_soft': 0.2+(node_sin(1+2*X+node_sin(2*X+node_sin(X)))+node_sin(X))/1.8,
+    'osc_pad':  (node_sin(1+2*X+node_sin(2*X+node_sin(2*X)))+node_sin(X))/2,
+    'osc_gtar': -nested_sine(3),
+    'osc_bell': -nested_sine(9),
+    'osc_bzzy': -0.62*node_asin(nested_sine(4)),
+    'osc_org':  -0.62*node_asin(nested_sine(8)),
+    'osc_dist': node_sin(1+X+node_sin(1+3*X+node_sin(9*X))),
+    'osc_rnd':  noise(),
+}
+oscGraphs['osc_clp'] = node_clip(2.2 * oscGraphs['osc_dist'])
+
+# flattens a graph into a list of steps with every distinct node in it once, children before parents, and returns
+# kernel(x, partials) that runs the steps over one phase array. compiled kernels are kept, so each graph is only compiled once
+@functools.lru_cache(maxsize=None)
+def compile_graph(graph):
+    slots = {X: 0, P: 1}
+    steps = []
+    def visit(node):
+        if not isinstance(node, oscNode):
+            return (False, node) # constants go straight into the step
+        if node not in slots:
+            args = [visit(arg) for arg in node[1:]]
+            steps.append((graphOps[node[0]], args))
+            slots[node] = len(slots)
+        return (True, slots[node])
+    output = visit(graph)[1]
+    def kernel(x, partials):
+        values = [x, partials]
+        for op, args in steps:
+            values.append(op(*[values[arg] if isSlot else arg for isSlot, arg in args]))
+        return values[output]
+    return kernel
+
+# oscGraphs is the list of oscillators, the oscillators class is only the scalar reference for the ones that have one
+allOscillators = list(oscGraphs)
+
+# the compiled kernel for an oscillator in oscGraphs, including any added after the program started
+def vector_oscillator(oscName):
+    return compile_graph(oscGraphs[oscName])
+
+# a stand-in for the scalar version of an oscillator that only has a graph: runs its kernel on one sample at a time,
+# so the scalar engine, write_chord_sample & everything else that passes oscillator functions around work the same for it
+@functools.lru_cache(maxsize=None)
+def graph_oscillator(oscName):
+    def oscillator(x, partials):
+        return float(vector_oscillator(oscName)(np.float64(x), partials))
+    oscillator.__name__ = oscillator.__qualname__ = oscName
+    return oscillator
+
+# the additive oscillators above are all sums of sin(n*x)/n with the cos^2 taper, so they can also be built straight from
+# their harmonic spectrum. 'name': (first harmonic, last harmonic or None to go up to the partials limit, odd harmonics only, gain)
+spectralOscillators = {
+    'osc_sine': (1, 2, False, 1.0),
+    'osc_saw':  (1, None, False, 0.5),
+    'osc_saw2': (2, 4, False, 1.0),
+    'osc_sqr':  (1, None, True, 1.0),
+    'osc_5th':  (2, 6, True, 2.0),
+    'osc_chor': (1, 3, False, 0.5),
+    'osc_voic': (1, 6, False, 0.5),
+    'osc_flut': (1, 4, True, 1.0),
+    'osc_whis': (1, 3, True, 1.0),
+}
+
+# returns the harmonic numbers and their amplitudes for one note of a spectral oscillator.
+# these only depend on the partials limit, so they're remembered between chords, banks and sweep settings
+@functools.lru_cache(maxsize=4096)
+def harmonic_amplitudes(oscName, partials):
+    first, last, oddOnly, gain = spectralOscillators[oscName]
+    if last is None:
+        last = partials
+    n = np.arange(first, max(first, last))
+    if oddOnly:
+        n = n[n%2 == 1]
+    if oscName == 'osc_sine':
+        return n, np.ones(len(n))
+    k = pi/2/partials
+    m = np.cos((n-1)*k)
+    return n, gain * m*m / n
+
+#############################
+# Profiling / Instrumentation
+#############################
+# while a run is being profiled, every @profiled stage records its calls, wall time (including the stages it calls),
+# the process's peak traced memory while it ran, and the counters add_stat sends it (samples synthesized, bytes written,
+# files renamed by the isfile collision loop...) in total and per oscillator. nothing is recorded when profileStats is None
+profileStats = None
+profileLock = threading.Lock()
+profileThread = threading.local() # each thread keeps its own stack of running stages
+
+def start_profiling():
+    global profileStats
+    profileStats = {'stages': {}, 'oscillators': {}, 'started': time.perf_counter(), 'open': {}, 'peak': 0}
+    tracemalloc.start()
+
+# tracemalloc only has one peak for the whole process, so it's only ever read & reset here: every time a stage starts or stops
+# on any thread, the peak since the last sample goes to every stage still running (on every thread) & the run's peak.
+# needs profileLock
+def sample_peak():
+    peak = tracemalloc.get_traced_memory()[1]
+    for frame in profileStats['open'].values():
+        frame['peak'] = max(frame['peak'], peak)
+    profileStats['peak'] = max(profileStats['peak'], peak)
+    tracemalloc.reset_peak()
+
+# stops profiling and returns the report, also saved as json to jsonPath if given
+def stop_profiling(jsonPath=None):
+    global profileStats
+    with profileLock:
+        sample_peak()
+    stagePeaks = [entry.get('peakMemory', 0) for entry in profileStats['stages'].values()]
+    report = {'seconds': time.perf_counter() - profileStats['started'], 'peakMemory': max([profileStats['peak']] + stagePeaks),
+              'stages': profileStats['stages'], 'oscillators': profileStats['oscillators']}
+    tracemalloc.stop()
+    profileStats = None
+    if jsonPath:
+        with open(jsonPath, 'w') as jsonFile:
+            json.dump(report, jsonFile, indent=1)
+        print('profile written to '+jsonPath)
+    return report
+
+def stage_entries(name, osc):
+    entries = [profileStats['stages'].setdefault(name, {})]
+    if osc:
+        entries.append(profileStats['oscillators'].setdefault(osc, {}).setdefault(name, {}))
+    return entries
+
+# adds amount to counter on the innermost stage running on this thread
+def add_stat(counter, amount=1):
+    if profileStats is None or not getattr(profileThread, 'stack', None):
+        return
+    name, osc, frame = profileThread.stack[-1]
+    with profileLock:
+        for entry in stage_entries(name, osc):
+            entry[counter] = entry.get(counter, 0) + amount
+
+@contextlib.contextmanager
+def stage(name, osc=None):
+    if profileStats is None:
+        yield
+        return
+    stack = profileThread.__dict__.setdefault('stack', [])
+    frame = {'peak': 0}
+    with profileLock:
+        sample_peak()
+        profileStats['open'][id(frame)] = frame
+    stack.append((name, osc, frame))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        with profileLock:
+            sample_peak()
+            del profileStats['open'][id(frame)]
+            peak = frame['peak']
+            for entry in stage_entries(name, osc):
+                entry['calls'] = entry.get('calls', 0) + 1
+                entry['seconds'] = entry.get('seconds', 0) + seconds
+                entry['peakMemory'] = max(entry.get('peakMemory', 0), peak)
+
+# decorator that runs a function as a profiling stage named after it. oscOf picks the oscillator out of its arguments
+def profiled(oscOf=None):
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if profileStats is None:
+                return function(*args, **kwargs)
+            with stage(function.__name__, oscOf(args) if oscOf else None):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
 #######################
 # Function Definitions
 #######################
 
-def write_chord_sample(filename, f0, ratios, func): #no idea how this one works but it works
-    global digiProNum
-    i = 2
-    filenameold = filename
-    while os.path.isfile(filename) == True:
-        print(filename+' already exists')
-        filename = filenameold[:-4]+''+str(i)+'.wav'
-        i += 1
-    wav = wave.open(filename,'w')
-    wav.setnchannels(1)
-    wav.setsampwidth(2)
-    wav.setframerate(SAMPLE_RATE)
-    f0 = SAMPLE_RATE / round(SAMPLE_RATE / f0) # round it for perfect loops!
-    period = int(SAMPLE_RATE / f0)
+def cycle_length(f0, sampleRate=None):
+    sampleRate = sampleRate or SAMPLE_RATE
+    f0 = sampleRate / round(sampleRate / f0) # round it for perfect loops!
+    return f0, int(sampleRate / f0)
+
+# renders one loop of a chord with whichever engine renderEngine is set to, going through the render cache
+def render_cycle(f0, ratios, func, sampleRate=None):
+    key = render_key(f0, ratios, func, sampleRate)
+    samples = cache_get(key)
+    if samples is None:
+        samples = render_cycle_uncached(f0, ratios, func, sampleRate)
+        cache_put(key, samples)
+    return samples
+
+# returns a copy of a cached loop, or None if it isn't cached
+def cache_get(key):
+    if renderCacheMB <= 0 or key[0] == 'osc_rnd' or key not in renderCache: # noise should never repeat
+        return None
+    renderCache.move_to_end(key)
+    renderCacheStats['saved'] += 1
+    return renderCache[key].copy()
+
+def cache_put(key, samples):
+    renderCacheStats['renders'] += 1
+    add_stat('samples', len(samples))
+    if renderCacheMB <= 0 or key[0] == 'osc_rnd':
+        return
+    if key in renderCache: # replacing a loop mustn't count its old copy twice
+        renderCacheStats['bytes'] -= renderCache.pop(key).nbytes
+    renderCache[key] = samples.copy()
+    renderCacheStats['bytes'] += samples.nbytes
+    while renderCacheStats['bytes'] > renderCacheMB*1024*1024 and len(renderCache) > 1: # evict the least recently used loops
+        renderCacheStats['bytes'] -= renderCache.popitem(last=False)[1].nbytes
+
+# a loop only depends on its length and the exact frequency of each note, so that's the key rather than the chord's name or ratios.
+# the notes are kept in order since adding them up in a different order can change the last bit of a sample
+def render_key(f0, ratios, func, sampleRate=None):
+    sampleRate = sampleRate or SAMPLE_RATE
+    f0, period = cycle_length(f0, sampleRate)
+    return (func.__name__, renderEngine, sampleRate, period, tuple(f0 * r for r in ratios))
+
+def render_cycle_uncached(f0, ratios, func, sampleRate=None):
+    if renderEngine == 'scalar':
+        return render_cycle_scalar(f0, ratios, func, sampleRate)
+    if renderEngine == 'spectral':
+        return render_cycle_spectral(f0, ratios, func, sampleRate)
+    return render_cycle_vector(f0, ratios, func, sampleRate)
+
+# renders a list of planned jobs for one oscillator, returning their loops in the same order.
+# jobs whose loops are the same length are rendered together as one chords x samples matrix with the phase array built once,
+# so a whole bank only takes a handful of array expressions instead of one set per chord
+def render_jobs(jobs, func, sampleRate=None):
+    return [samples for job, samples in iter_render_jobs(jobs, func, sampleRate)]
+
+# same as render_jobs but yields (job, samples) in job order as soon as each group is rendered,
+# so the writer can start on the first files while the rest of the bank is still rendering.
+# jobs in the same bank with the same key are only rendered once, the others get copies of it
+def iter_render_jobs(jobs, func, sampleRate=None):
+    sampleRate = sampleRate or SAMPLE_RATE
+    results = {}
+    groups = {}
+    copiesOf = {} # key: indexes of the jobs waiting on that key's render
+    for i, job in enumerate(jobs):
+        key = render_key(job['f0'], job['ratios'], func, sampleRate)
+        samples = cache_get(key)
+        if samples is not None:
+            results[i] = samples
+            continue
+        pending = key if key[0] != 'osc_rnd' else (key, i) # noise should never repeat
+        if pending not in copiesOf:
+            copiesOf[pending] = []
+            groups.setdefault(cycle_length(job['f0'], sampleRate), []).append((i, key, pending))
+        copiesOf[pending].append(i)
+    nextJob = 0
+    for (f0, period), members in groups.items():
+        ratioLists = [jobs[i]['ratios'] for i, key, pending in members]
+        for (i, key, pending), samples in zip(members, render_batch(f0, ratioLists, func, sampleRate)):
+            cache_put(key, samples)
+            for j in copiesOf[pending]:
+                results[j] = samples if j == i else samples.copy()
+            renderCacheStats['saved'] += len(copiesOf[pending]) - 1
+        while nextJob in results:
+            yield jobs[nextJob], results.pop(nextJob)
+            nextJob += 1
+    for i in range(nextJob, len(jobs)): # cached jobs after the last rendered group
+        yield jobs[i], results.pop(i)
+
+# renders chords that all share the loop fundamental f0, one row per chord
+def render_batch(f0, ratioLists, func, sampleRate=None):
+    sampleRate = sampleRate or SAMPLE_RATE
+    oscName = func.__name__
+    if renderEngine == 'scalar' or oscName == 'osc_rnd': # the scalar reference and the noise stream stay one chord at a time
+        return [render_cycle_uncached(f0, ratios, func, sampleRate) for ratios in ratioLists]
+    f0, period = cycle_length(f0, sampleRate)
+    if renderEngine == 'spectral' and oscName in spectralOscillators:
+        return render_batch_spectral(f0, period, ratioLists, func, sampleRate)
+    vecFunc = vector_oscillator(oscName)
+    t = np.arange(period)*pi*2/sampleRate
+    maxNotes = max(len(ratios) for ratios in ratioLists)
+    notes = np.zeros((len(ratioLists), maxNotes, period)) # padding notes stay 0.0, adding them on doesn't change a bit
+    notesByPartials = {}
+    for c, ratios in enumerate(ratioLists):
+        for j, r in enumerate(ratios):
+            f = f0 * r
+            partials = int(sampleRate/2/f) # Nyqist frequency / note frequency
+            notesByPartials.setdefault(partials, []).append((c, j, f))
+    for partials, group in notesByPartials.items(): # every note with the same partials limit in one call
+        c, j, f = (np.array(column) for column in zip(*group))
+        notes[c, j] = vecFunc(f[:, None]*t, partials)
+    v = 0.0
+    for j in range(maxNotes): # add the notes up in the same order render_cycle_vector does
+        v = v + notes[:, j]
+    return list(v / np.array([len(ratios) for ratios in ratioLists])[:, None])
+
+def render_batch_spectral(f0, period, ratioLists, func, sampleRate):
+    spectra = np.zeros((len(ratioLists), period//2+1), dtype=complex)
+    fallback = {}
+    for c, ratios in enumerate(ratioLists):
+        if any(r != int(r) for r in ratios):
+            fallback[c] = render_cycle_vector(f0, ratios, func, sampleRate)
+            continue
+        for r in ratios:
+            n, amps = harmonic_amplitudes(func.__name__, int(sampleRate/2/(f0 * r)))
+            bins = n*int(r)
+            if len(bins) and bins[-1] >= period/2:
+                fallback[c] = render_cycle_vector(f0, ratios, func, sampleRate)
+                break
+            np.add.at(spectra[c], bins, -0.5j*period*amps)
+    loops = np.fft.irfft(spectra, period, axis=1) / np.array([len(ratios) for ratios in ratioLists])[:, None]
+    return [fallback.get(c, loop) for c, loop in enumerate(loops)]
+
+# renders one loop of a chord as an array of floats, one whole chord per array expression
+def render_cycle_vector(f0, ratios, func, sampleRate=None):
+    sampleRate = sampleRate or SAMPLE_RATE
+    vecFunc = vector_oscillator(func.__name__)
+    f0, period = cycle_length(f0, sampleRate)
+    t = np.arange(period)*pi*2/sampleRate
+    v = 0.0
+    for r in ratios:
+        f = f0 * r
+        partials = int(sampleRate/2/f) # Nyqist frequency / note frequency
+        v = v + vecFunc(f*t, partials)
+    return v / len(ratios)
+
+# builds the whole chord as one spectrum and turns it into a loop with a single inverse fft.
+# every note of the chord fits a whole number of times into the loop, so harmonic n of ratio r lands exactly on bin n*r.
+# oscillators that aren't in spectralOscillators, or chords with fractional ratios, fall back to the array engine
+def render_cycle_spectral(f0, ratios, func, sampleRate=None):
+    sampleRate = sampleRate or SAMPLE_RATE
+    oscName = func.__name__
+    if oscName not in spectralOscillators or any(r != int(r) for r in ratios):
+        return render_cycle_vector(f0, ratios, func, sampleRate)
+    f0, period = cycle_length(f0, sampleRate)
+    spectrum = np.zeros(period//2+1, dtype=complex)
+    for r in ratios:
+        f = f0 * r
+        partials = int(sampleRate/2/f) # Nyqist frequency / note frequency
+        n, amps = harmonic_amplitudes(oscName, partials)
+        bins = n*int(r)
+        if len(bins) and bins[-1] >= period/2: # a fixed harmonic range that runs past nyquist would fold back, leave it to the array engine
+            return render_cycle_vector(f0, ratios, func, sampleRate)
+        np.add.at(spectrum, bins, -0.5j*period*amps) # irfft turns -j*N/2 at bin k into sin(2*pi*k*i/N)
+    return np.fft.irfft(spectrum, period) / len(ratios)
+
+# the original sample by sample loop, kept as the reference for the array engine
+def render_cycle_scalar(f0, ratios, func, sampleRate=None):
+    sampleRate = sampleRate or SAMPLE_RATE
+    func = get_oscillator(func)
+    f0, period = cycle_length(f0, sampleRate)
+    samples = []
     i = 0
     while i < period:
-        t = i*pi*2/SAMPLE_RATE
+        t = i*pi*2/sampleRate
         v = 0.0
         for r in ratios:
             f = f0 * r
-            partials = int(SAMPLE_RATE/2/f) # Nyqist frequency / note frequency
-            #print('in loop '+str(partials))
+            partials = int(sampleRate/2/f) # Nyqist frequency / note frequency
             v += func(f*t, partials)
         v /= len(ratios)
-        data = struct.pack('<h', int(32767*v))
-        wav.writeframes(data)
+        samples.append(v)
         i += 1
+    return np.array(samples)
+
+# renders every chord in the chord array with both engines and counts the 16 bit samples that don't match,
+# then renders each oscillator's planned bank through render_jobs the way a build does (batched, uncached) and checks that against the scalar loop too
+def compare_engines(oscNames=None):
+    global renderEngine, renderCacheMB
+    if oscNames is None:
+        oscNames = [osc for osc in allOscillators if hasattr(oscillators, osc) and osc != 'osc_rnd']
+    mismatches = {}
+    def check(label, ref, vec):
+        ref = [int(32767*v) for v in ref]
+        vec = [int(32767*v) for v in vec]
+        diff = sum(1 for a, b in zip(ref, vec) if a != b)
+        if diff != 0 or len(ref) != len(vec):
+            mismatches[label] = diff
+            print('ENGINE MISMATCH: '+label.replace('/', ' ')+' '+str(diff)+' samples differ')
+    for oscName in oscNames:
+        func = get_oscillator(oscName)
+        for chord in active_chords():
+            ratios = chord[1]
+            check(oscName+'/'+chord[0], render_cycle_scalar(F0 / ratios[0], ratios, func), render_cycle_vector(F0 / ratios[0], ratios, func))
+    print(str(len(mismatches))+' mismatching chord waves between the scalar and array engines')
+    chordMismatches = len(mismatches)
+    oldEngine, oldCacheMB = renderEngine, renderCacheMB
+    renderEngine, renderCacheMB = 'vector', 0 # the batched array path, with nothing served from the cache
+    try:
+        for oscName in oscNames:
+            func = get_oscillator(oscName)
+            jobs = plan_chords(func, False, verbose=False)
+            for job, samples in zip(jobs, render_jobs(jobs, func)):
+                check(job['filename'], render_cycle_scalar(job['f0'], job['ratios'], func), samples)
+    finally:
+        renderEngine, renderCacheMB = oldEngine, oldCacheMB
+    print(str(len(mismatches)-chordMismatches)+' mismatching bank loops between the scalar engine and render_jobs')
+    return mismatches
+
+# the gain stage runs on whole rendered loops, after the render cache, so it never changes what gets cached.
+# the level gainMode measures for one loop
+def loop_level(samples):
+    if gainMode == 'rms':
+        return float(np.sqrt(np.mean(np.square(samples))))
+    return float(np.abs(samples).max())
+
+# the gain that puts each loop on gainLevel, or with gainScope = 'bank' one gain for all of them set by the loudest loop
+def loop_gains(loops):
+    levels = np.array([loop_level(samples) for samples in loops])
+    if gainScope == 'bank' and len(levels):
+        levels[:] = levels.max()
+    return np.divide(10**(gainLevel/20), levels, out=np.ones(len(levels)), where=levels > 0)
+
+# leaves everything under the knee alone and bends the rest smoothly towards +-1, the slope is still 1 at the knee so nothing jumps
+def soft_clip(samples, knee=0.8):
+    over = np.maximum(np.abs(samples) - knee, 0)
+    return np.where(over > 0, np.sign(samples) * (knee + (1-knee)*np.tanh(over/(1-knee))), samples)
+
+def gain_stage(samples, gain=1.0):
+    if gain != 1.0:
+        samples = samples * gain
+    if softClip == 1:
+        samples = soft_clip(samples)
+    return samples
+
+# runs (job, samples) pairs from iter_render_jobs through the gain stage. per chord every loop is turned up or down as it arrives,
+# per bank the whole bank is held until its loudest loop is known. jobs that already carry a 'gain' (from the main process) keep it
+def iter_gain_stage(pairs):
+    gains = None
+    if gainMode != 'off' and gainScope == 'bank':
+        pairs = list(pairs)
+        gains = loop_gains([samples for job, samples in pairs])
+    for i, (job, samples) in enumerate(pairs):
+        if 'gain' in job:
+            gain = job['gain']
+        elif gains is not None:
+            gain = gains[i]
+        else:
+            gain = loop_gains([samples])[0] if gainMode != 'off' else 1.0
+        yield job, gain_stage(samples, gain)
+
+# scales a loop to 16 bit in one go. anything an oscillator pushes past +-1 is clipped instead of crashing the writer,
+# everything else truncates exactly like int(32767*v) did. with dither on, triangular noise of +-1 step is added and the samples
+# are rounded instead. the noise is seeded from the loop itself so the same loop always gets the same file on any process
+def quantize_cycle(samples):
+    scaled = 32767*np.clip(samples, -1.0, 1.0)
+    if dither == 1:
+        noise = np.random.default_rng(int.from_bytes(hashlib.sha256(scaled.tobytes()).digest()[:8], 'little'))
+        scaled = np.clip(np.round(scaled + noise.random(len(scaled)) - noise.random(len(scaled))), -32767, 32767)
+    return scaled.astype('<i2')
+
+def write_wav(wavFile, samples, sampleRate=None):
+    wav = wave.open(wavFile,'wb')
+    wav.setnchannels(1)
+    wav.setsampwidth(2)
+    wav.setframerate(sampleRate or SAMPLE_RATE)
+    frames = (samples if samples.dtype == np.int16 else quantize_cycle(samples)).astype('<i2').tobytes() # 16 bit samples go in as they are
+    wav.writeframes(frames) # whole loop in one write
     wav.close()
+    if isinstance(wavFile, str):
+        add_stat('bytes', len(frames))
+
+# the finished .wav file as bytes, nothing touches the disk
+def wav_bytes(samples, sampleRate=None):
+    buffer = io.BytesIO()
+    write_wav(buffer, samples, sampleRate)
+    return buffer.getvalue()
+
+def chord_wav_bytes(f0, ratios, func, sampleRate=None):
+    return wav_bytes(render_cycle(f0, ratios, func, sampleRate), sampleRate)
+
+# every file write_all_chords would write for osc, as {filename: .wav bytes} in slot order, without touching the disk
+def bank_wav_bytes(osc, chordList=None, f0=None, sampleRate=None):
+    return {filename: wav_bytes(samples, sampleRate) for filename, samples in render_bank(osc, chordList, f0, sampleRate).items()}
+
+
+# returns the first free name for filename, adding 2, 3, 4... before the extension like C6 users are used to
+def claim_filename(filename, claimed, checkDisk=True, verbose=True):
+    i = 2
+    filenameold = filename
+    while filename in claimed or (checkDisk and os.path.isfile(filename) == True):
+        if verbose:
+            print(filename+' already exists')
+        filename = os.path.splitext(filenameold)[0]+str(i)+os.path.splitext(filenameold)[1]
+        i += 1
+    if filename != filenameold:
+        add_stat('renamed')
+    claimed.add(filename)
+    return filename
+
+
+@profiled(lambda args: args[3].__name__)
+def write_chord_sample(filename, f0, ratios, func, slot=None, samples=None): #no idea how this one works but it works
+    global digiProNum
+    if slot is None: # unplanned files just take the next slot and the next free name, planned ones already have theirs
+        slot = digiProNum
+        digiProNum += 1
+        filename = claim_filename(filename, set())
+    if samples is None:
+        samples = render_cycle(f0, ratios, func)
+    write_wav(filename, samples)
+    add_stat('files')
     print('GENERATED: '+filename+'  IT`S RATIOS: '+str(ratios))
-    os.utime(filename,(0,baseEpoch+epochInc * digiProNum)) #write iterating timestamp to file to organize wavs. old:1009836000 + 31536000 * digiProNum
-    digiProNum += 1
+    os.utime(filename,(0,baseEpoch+epochInc * slot)) #write iterating timestamp to file to organize wavs. old:1009836000 + 31536000 * digiProNum
 
 
-def write_all_chords(func):
+# expands the chord array into the list of files write_all_chords would write for func, in DigiPro slot order.
+# every job already has its final filename, slot number & loop length at sampleRate, so the jobs can be written in any order
+# or on any process. jobs that had to be renamed keep the name they asked for as 'requested'
+def plan_chords(func, checkDisk=True, chordList=None, f0=None, verbose=True, sampleRate=None):
+    say = print if verbose else lambda *args: None
+    if chordList is None:
+        chordList = active_chords()
+    rootF0 = f0 or F0
     path = func.__name__
-    os.makedirs(path)
-    for chord in chords:
+    jobs = []
+    claimed = set()
+    def add(filename, f0, ratios):
+        job = {'osc': path, 'filename': claim_filename(filename, claimed, checkDisk, verbose), 'f0': f0, 'ratios': ratios, 'slot': len(jobs),
+               'period': cycle_length(f0, sampleRate)[1]}
+        if job['filename'] != filename:
+            job['requested'] = filename
+        jobs.append(job)
+    for chord in chordList:
         name = chord[0][:3]
         ratios = chord[1]
         customInversions = chord[2]
-        print('\nSTARTING '+chord[0]+'...')
+        say('\nSTARTING '+chord[0]+'...')
         #skip everything for unison waves or tracks with no programmed inversions in chord[2]
         if len(ratios) == 1 or len(customInversions) == 0 or genInversions == 0:
             name = chord[0][:4]
-            print('no inversions for '+name)
+            say('no inversions for '+name)
             filename = path+'/'+name+'.wav'
-            write_chord_sample(filename, F0 / ratios[0], ratios, func)
+            add(filename, rootF0 / ratios[0], ratios)
             continue
         else:
             filename = path+'/'+name+'0.wav'
-        write_chord_sample(filename, F0 / ratios[0], ratios, func) # root position, root at 0
+        add(filename, rootF0 / ratios[0], ratios) # root position, root at 0
         inversionFactor=2
         if smartInvert == 1:
             while(inversionFactor <= ratios[len(ratios)-1]/ratios[0]):
@@ -454,10 +1060,10 @@ def write_all_chords(func):
        
         #Do all of the inversion generation logic
         if genInversions == 1:
-            print('GENERATING INVERSIONS:') #,end =" "
+            say('GENERATING INVERSIONS:') #,end =" "
             inversionCount = 1
             if inversionCount in customInversions:
-                print('Custom Inversions for'+name+' are '+str(customInversions))
+                say('Custom Inversions for'+name+' are '+str(customInversions))
             for position in range(1,len(ratios)): # second value in range controls how many inversions are generated. len(ratios) will generate all inversions
                 inversion = list(map(lambda ratio: ratio*inversionFactor, ratios[:position]))+ratios[position:]
                 filename = path+'/'+name+str(inversionCount)+'.wav'
@@ -465,10 +1071,10 @@ def write_all_chords(func):
                     if inversionCount in customInversions:
                         pass
                     else:
-                        print('skipping   '+filename+'  IT`S RATIOS WERE: '+str(inversion))
+                        say('skipping   '+filename+'  IT`S RATIOS WERE: '+str(inversion))
                         inversionCount += 1
                         continue
-                write_chord_sample(filename, F0 / ratios[0], inversion, func)
+                add(filename, rootF0 / ratios[0], inversion)
                 inversionCount += 1
                
             if genUp1Octave == 1:
@@ -476,9 +1082,215 @@ def write_all_chords(func):
                 for ratio in ratios:
                     ratiosUp1Octave.append(ratio * 2)
                 filename = path+'/'+name+'+.wav'
-                write_chord_sample(filename, F0 / ratios[0], ratiosUp1Octave, func)
+                add(filename, rootF0 / ratios[0], ratiosUp1Octave)
+    return jobs
+
+
+# sizes a planned bank without rendering anything: files, slots used with the user files (their names in the bank), loop samples, .wav bytes, and
+# everything that would trip up C6 or the MnM. renamed lists files that had to take another name, displayCollisions lists the
+# 4 letter names C6 would give more than one wave, overflow is how many waves don't fit in digiProSlots
+def plan_summary(jobs, userFiles=()):
+    names = [job['filename'] for job in jobs] + list(userFiles)
+    displayNames = {}
+    for name in names:
+        displayNames.setdefault(digipro_name(name).decode('ascii'), []).append(name)
+    samples = sum(job['period'] for job in jobs)
+    return {'osc': jobs[0]['osc'] if jobs else None, 'files': len(jobs), 'userFiles': len(userFiles), 'slots': len(names),
+            'overflow': max(0, len(names) - digiProSlots), 'samples': samples, 'bytes': 2*samples + 44*len(jobs),
+            'minPeriod': min((job['period'] for job in jobs), default=0), 'maxPeriod': max((job['period'] for job in jobs), default=0),
+            'renamed': [[job['requested'], job['filename']] for job in jobs if 'requested' in job],
+            'displayCollisions': {name: files for name, files in displayNames.items() if len(files) > 1}}
+
+def print_plan(summaries):
+    columns = ['osc', 'files', 'userFiles', 'slots', 'overflow', 'samples', 'minPeriod', 'maxPeriod']
+    print(spacer)
+    print(''.join(column.ljust(12) for column in columns))
+    for summary in summaries:
+        print(''.join(str(summary[column]).ljust(12) for column in columns))
+        for requested, filename in summary['renamed']:
+            print('  RENAMED: '+requested+' -> '+filename)
+        for name, files in summary['displayCollisions'].items():
+            print('  C6 NAME COLLISION: '+name+' would be shown for '+', '.join(files))
+        if summary['overflow']:
+            print('  OVERFLOW: '+str(summary['overflow'])+' waves more than the '+str(digiProSlots)+' a DigiPro bank holds')
+    print('total: '+str(sum(summary['files'] for summary in summaries))+' files, '+str(sum(summary['samples'] for summary in summaries))+' samples')
+    print(spacer)
+
+# plans every oscillator in funcs without rendering or touching the disk and prints the sizes. saves the summaries and every job to jsonPath if given
+def dry_run(funcs, jsonPath=None):
+    userFiles = load_user_files(addendumPath) if appendUserFilesFlag == 1 else []
+    plans = [plan_chords(func, False, verbose=False) for func in funcs]
+    summaries = [dict(plan_summary(jobs, [filename for filename, entry in user_file_names(func, userFiles, jobs)]), osc=func.__name__)
+                 for func, jobs in zip(funcs, plans)]
+    print_plan(summaries)
+    if jsonPath:
+        with open(jsonPath, 'w') as jsonFile:
+            json.dump({'settings': render_settings(), 'banks': [dict(summary, jobs=jobs) for summary, jobs in zip(summaries, plans)]}, jsonFile, indent=1)
+        print('plan written to '+jsonPath)
+    return summaries
+
+
+def write_job(job, samples=None):
+    saved = renderCacheStats['saved']
+    if samples is None: # worker processes render their own jobs
+        job, samples = next(iter_gain_stage([(job, render_cycle(job['f0'], job['ratios'], get_oscillator(job['osc'])))]))
+    write_chord_sample(job['filename'], job['f0'], job['ratios'], get_oscillator(job['osc']), job['slot'], samples)
+    return renderCacheStats['saved'] - saved # so the main process can count cache hits on worker processes
+
+
+# renders and writes a planned bank, planning it here if jobs isn't given. every loop it renders is also kept in rendered
+# as {filename: samples} if a dict is passed in, so nothing has to render it again afterwards
+@profiled(lambda args: args[0].__name__)
+def write_all_chords(func, jobs=None, rendered=None):
+    os.makedirs(func.__name__, exist_ok=incrementalBuild == 1)
+    if jobs is None:
+        jobs = plan_chords(func, checkDisk=incrementalBuild != 1)
+    with backgroundWriter(writerThreads, writeQueueSize) as writer:
+        for job, samples in iter_gain_stage(iter_render_jobs(changed_jobs(func, jobs), func)):
+            writer.write(job, samples)
+            if rendered is not None:
+                rendered[job['filename']] = samples
+    save_manifest(func, jobs)
+    return len(jobs)
+
+
+# incremental builds keep a manifest next to each oscillator folder (osc_saw.manifest.json) of {filename: key},
+# where the key hashes everything that changes what a file sounds like. only files whose key changed get rendered again
+def manifest_path(func):
+    return func.__name__+'.manifest.json'
+
+# remembered for the life of the process, so editing the script while watch mode runs can't make inspect read the new file
+# at the old line numbers. the running oscillators don't change until the program is restarted anyway
+@functools.lru_cache(maxsize=None)
+def oscillator_source(oscName):
+    scalar = getattr(oscillators, oscName, None)
+    source = (inspect.getsource(scalar) if scalar else '') + repr(oscGraphs[oscName])
+    return source + str(spectralOscillators.get(oscName))
+
+def job_key(job):
+    settings = dict(render_settings(), normalizeChords=normalizeChords, genInversions=genInversions, smartInvert=smartInvert,
+                    genCustomInversions=genCustomInversions, genUp1Octave=genUp1Octave)
+    keyData = [oscillator_source(job['osc']), job['filename'], job['ratios'], job['f0'], sorted(settings.items())]
+    return hashlib.sha256(json.dumps(keyData).encode()).hexdigest()
+
+# returns the jobs that need rendering. when incrementalBuild is on, files from the last build that aren't planned anymore
+# are deleted and files that haven't changed only get their slot timestamp rewritten in case the order moved
+def changed_jobs(func, jobs):
+    if incrementalBuild != 1:
+        return jobs
+    manifest = {}
+    if os.path.isfile(manifest_path(func)):
+        with open(manifest_path(func)) as manifestFile:
+            manifest = json.load(manifestFile)
+    planned = set(job['filename'] for job in jobs)
+    removed = [filename for filename in manifest if filename not in planned]
+    for filename in removed:
+        if os.path.isfile(filename):
+            os.remove(filename)
+            print('removed '+filename)
+    changed = []
+    for job in jobs:
+        job['key'] = job_key(job)
+        if manifest.get(job['filename']) == job['key'] and os.path.isfile(job['filename']):
+            os.utime(job['filename'],(0,baseEpoch+epochInc * job['slot']))
+        else:
+            changed.append(job)
+    if (changed or removed) and gainMode != 'off' and gainScope == 'bank': # one changed loop can move the gain of the whole bank
+        changed = jobs
+    print(func.__name__+': '+str(len(changed))+' of '+str(len(jobs))+' files changed')
+    return changed
+
+# written once the bank is on disk so an interrupted build never marks unwritten files as done
+def save_manifest(func, jobs):
+    if incrementalBuild != 1:
+        return
+    with open(manifest_path(func), 'w') as manifestFile:
+        json.dump({job['filename']: job.get('key') or job_key(job) for job in jobs}, manifestFile, indent=1)
+
+
+# the write half of the pipeline: rendered loops go into a bounded queue and a few threads take care of wave.open,
+# the frame writes and the timestamps while the main thread renders the next ones. a full queue makes the renderer wait,
+# so no more than queueSize loops are ever waiting in memory. with 0 threads every file is written straight away
+class backgroundWriter(object):
+    def __init__(self, threads, queueSize=16):
+        self.queue = queue.Queue(maxsize=queueSize)
+        self.errors = []
+        self.threads = [threading.Thread(target=self.work, daemon=True) for _ in range(threads)]
+        for thread in self.threads:
+            thread.start()
+
+    def work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            try:
+                write_job(*item)
+            except Exception as error: # handed back to the main thread by write() or close()
+                self.errors.append(error)
+
+    def write(self, job, samples):
+        if self.errors:
+            raise self.errors[0]
+        if not self.threads:
+            write_job(job, samples)
+        else:
+            self.queue.put((job, samples))
+
+    def close(self):
+        for thread in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# the settings that change what a rendered file sounds like
+def render_settings():
+    return {'SAMPLE_RATE': SAMPLE_RATE, 'renderEngine': renderEngine, 'gainMode': gainMode, 'gainScope': gainScope,
+            'gainLevel': gainLevel, 'softClip': softClip, 'dither': dither}
+
+# the settings a worker process needs, so spawned workers render the same thing as this process
+def worker_settings():
+    return dict(render_settings(), baseEpoch=baseEpoch, epochInc=epochInc, renderCacheMB=renderCacheMB)
+
+def init_worker(settings):
+    globals().update(settings)
 
+# plans every oscillator up front and spreads the (oscillator, chord, inversion) jobs over a process pool.
+# the slots come from the plan, not from the order the jobs finish in, so filenames and timestamps match a serial run.
+# returns how many chord files were planned for each oscillator. plans can hand over {osc: jobs} that were already planned
+def write_all_chords_parallel(funcs, processes, plans=None):
+    jobs = []
+    jobCounts = {}
+    planned = plans or {}
+    plans = []
+    for func in funcs:
+        os.makedirs(func.__name__, exist_ok=incrementalBuild == 1)
+        oscJobs = planned.get(func.__name__) or plan_chords(func, checkDisk=incrementalBuild != 1)
+        jobCounts[func.__name__] = len(oscJobs)
+        plans.append((func, oscJobs))
+        oscChanged = changed_jobs(func, oscJobs)
+        if oscChanged and gainMode != 'off' and gainScope == 'bank': # the workers only see single jobs, so the bank gain is worked out here
+            for job, gain in zip(oscChanged, loop_gains(render_jobs(oscChanged, func))):
+                job['gain'] = gain
+        jobs += oscChanged
+    with ProcessPoolExecutor(max_workers=processes or None, initializer=init_worker, initargs=(worker_settings(),)) as pool:
+        for saved in pool.map(write_job, jobs, chunksize=4):
+            renderCacheStats['saved'] += saved
+    for func, oscJobs in plans:
+        save_manifest(func, oscJobs)
+    return jobCounts
 
+
+@profiled(lambda args: uniPath)
 def write_all_unison():
     global allOscillators
     print('\n'+str(len(allOscillators))+' Oscillators To Generate. Full List: '+str(allOscillators))
@@ -489,35 +1301,157 @@ def write_all_unison():
         os.makedirs(uniPath)
         #print('made /'+uniPath+'/ directory')
     global digiProNum
-    digiProNum = 0
     #os.chdir(home)
-    allOscillators = [func for func in list(oscillators.__dict__.keys()) if callable(getattr(oscillators(), func)) and not func.startswith("__")]
+    allOscillators = list(oscGraphs)
+    jobs = plan_unison()
+    with backgroundWriter(writerThreads, writeQueueSize) as writer:
+        for job, samples in iter_gain_stage((job, render_cycle(job['f0'], job['ratios'], get_oscillator(job['osc']))) for job in jobs):
+            writer.write(job, samples)
+    digiProNum = len(jobs)
+
+# every unison wave write_all_unison writes, a plain one and one with a note 4 octaves up for each oscillator.
+# names are claimed here in order so the writer threads can't race each other for dist.wav & dist2.wav
+def plan_unison(verbose=True):
+    jobs = []
+    claimed = set()
     for oscToGen in allOscillators:
-        func = getattr(oscillators, oscToGen)
-        funcStr = func.__name__.replace('osc_','')+'.wav'
-        write_chord_sample(uniPath+'/'+funcStr, F0, [1], func)
-        write_chord_sample(uniPath+'/'+funcStr, F0, [1,16], func)
+        funcStr = oscToGen.replace('osc_','')+'.wav'
+        for ratios in ([1], [1,16]):
+            jobs.append({'osc': oscToGen, 'filename': claim_filename(uniPath+'/'+funcStr, claimed, False, verbose), 'f0': F0, 'ratios': ratios, 'slot': len(jobs),
+                         'period': cycle_length(F0)[1]})
+    return jobs
+
 
+# user files are scanned, checked & converted once per run and kept in memory, then written from there into every bank.
+# the cache is keyed on the folder's listing, so a changed or added file gets picked up by the next call
+userFileCache = {}
+
+# reads and checks every file in addendumPath, returns one entry per usable file in name order:
+# {'source', 'name', 'kind', 'data', 'samples', 'format', 'converted'}. name is the short name it gets in the banks
+# (1234.XYZ with '_' taken out), data is the bytes that get written. .wav files that aren't already mono 16 bit at
+# SAMPLE_RATE are converted, .syx & anything else is kept as it is. files that can't be used are skipped with a warning
+def load_user_files(addendumPath):
+    if not os.path.isdir(addendumPath):
+        return []
+    listing = tuple(sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size) for entry in os.scandir(addendumPath)
+                           if entry.is_file() and not entry.name.startswith('.')))
+    key = (os.path.abspath(addendumPath), SAMPLE_RATE, listing)
+    if key not in userFileCache:
+        userFileCache.clear()
+        entries = [load_user_file(os.path.join(addendumPath, name)) for name, mtime, size in listing]
+        userFileCache[key] = [entry for entry in entries if entry]
+    return userFileCache[key]
+
+def load_user_file(sourcePath):
+    with open(sourcePath, 'rb') as sourceFile:
+        data = sourceFile.read()
+    fileToAppend = os.path.basename(sourcePath)
+    entry = {'source': sourcePath, 'name': fileToAppend[-8:].replace('_',''), #chop off everything except 1234.XYZ, and the leading underscore of 3 letter names
+             'kind': os.path.splitext(fileToAppend)[1].lower(), 'data': data, 'samples': None, 'format': None, 'converted': False}
+    if entry['kind'] != '.wav':
+        return entry
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wav:
+            channels, width, rate, frames = wav.getnchannels(), wav.getsampwidth(), wav.getframerate(), wav.readframes(wav.getnframes())
+        entry['samples'] = pcm_to_float(frames, width, channels)
+    except (wave.Error, EOFError, ValueError) as error:
+        print('SKIPPED "'+fileToAppend+'": '+(str(error) or 'not a readable .wav')) # a file cut short raises an EOFError with no message
+        return None
+    if not len(entry['samples']):
+        print('SKIPPED "'+fileToAppend+'": no samples')
+        return None
+    entry['format'] = {'channels': channels, 'width': width, 'rate': rate}
+    if (channels, width, rate) != (1, 2, SAMPLE_RATE):
+        # single cycles keep every sample, only the header's rate changes. resampling a loop would just throw resolution away
+        entry['data'] = wav_bytes(np.clip(np.round(entry['samples']*32768), -32768, 32767).astype(np.int16))
+        entry['converted'] = True
+        print('CONVERTED "'+fileToAppend+'": '+str(channels)+' channels '+str(8*width)+' bit '+str(rate)+' Hz -> mono 16 bit '+'%g' % SAMPLE_RATE+' Hz')
+    return entry
+
+# the filename each user file gets in func's bank, as [(filename, entry)]. names already taken by a chord or another user file
+# get a number added like claim_filename does anywhere else, so nothing is ever overwritten
+def user_file_names(func, entries, jobs=None):
+    if jobs is None:
+        jobs = plan_chords(func, False, verbose=False)
+    claimed = set(job['filename'] for job in jobs)
+    return [(claim_filename(func.__name__+'/'+entry['name'], claimed, False, False), entry) for entry in entries]
 
 # this function adds files from a user defined directory to the end of the generated file list for the MnM
 # this can be useful to add a few extra monophonic tones to the end of the digipro bank such as a noise oscilator and some bass notes
-def append_user_files(func,addendumPath):
+@profiled(lambda args: args[0].__name__)
+def append_user_files(func,addendumPath, jobs=None):
     print('\n')
     global digiProNum
     if not os.path.exists(addendumPath): os.makedirs(addendumPath)
-    path = func.__name__
-    filesToAppend = os.listdir(addendumPath+'/')
-    filesToAppend = sorted(filesToAppend)
-    for fileToAppend in filesToAppend:
-        truncFileName = fileToAppend[-8:] #chop off everything except 1234.XYZ from file name
-        truncFileName = truncFileName.replace('_','') #if the desired appeneded file is only 3 letters ie tri, remove leading underscore
-        shutil.copyfile(addendumPath+'/'+fileToAppend, path+'/'+truncFileName)
-        os.utime(path+'/'+truncFileName,(0,baseEpoch+epochInc * digiProNum))
-        print('appended "'+fileToAppend+'" as "'+truncFileName+'"')
+    for filename, entry in user_file_names(func, load_user_files(addendumPath), jobs):
+        with open(filename, 'wb') as userFile:
+            userFile.write(entry['data'])
+        add_stat('files')
+        add_stat('bytes', len(entry['data']))
+        os.utime(filename,(0,baseEpoch+epochInc * digiProNum))
+        print('appended "'+os.path.basename(entry['source'])+'" as "'+os.path.basename(filename)+'"')
         digiProNum += 1
 
+# draws a whole bank into one figure: every wave is a line in a single LineCollection laid out on a grid, so there's
+# no subplot per file. uses matplotlib's Agg canvas directly, no pyplot or display needed. bank is {filename: samples}
+def draw_contact_sheet(title, bank, sheetPath):
+    from matplotlib.figure import Figure
+    from matplotlib.collections import LineCollection
+    names = list(bank)
+    gs = max(1, ceil(sqrt(len(names)))) # same NxN grid as printGraphs
+    rows = max(1, ceil(len(names)/gs))
+    figure = Figure(figsize=(gs*2.5, rows*2))
+    axis = figure.add_axes([0, 0, 1, 0.96])
+    waves = []
+    zeroLines = []
+    for i, name in enumerate(names):
+        row, col = divmod(i, gs)
+        samples = np.asarray(bank[name])
+        x = col + 0.05 + 0.9*np.arange(len(samples))/max(1, len(samples)-1)
+        waves.append(np.column_stack([x, -row - 0.55 + 0.4*np.clip(samples, -1, 1)]))
+        zeroLines.append([(col + 0.05, -row - 0.55), (col + 0.95, -row - 0.55)])
+        axis.text(col + 0.05, -row - 0.05, os.path.basename(name), fontsize=7, va='top')
+    axis.add_collection(LineCollection(zeroLines, linewidths=0.3, colors='0.8'))
+    axis.add_collection(LineCollection(waves, linewidths=0.6))
+    axis.set_xlim(0, gs)
+    axis.set_ylim(-rows, 0)
+    axis.axis('off')
+    figure.suptitle(title)
+    figure.savefig(sheetPath, dpi=100)
+    return sheetPath
+
+# the loops of a bank that's already been written, as {filename: samples} in slot order. the ones write_all_chords kept in
+# rendered come straight from memory, the rest (rendered on worker processes, or left alone by an incremental build) are
+# read back from their .wav instead of being rendered again
+def written_bank(jobs, rendered=None):
+    rendered = rendered or {}
+    return {job['filename']: rendered[job['filename']] if job['filename'] in rendered else read_wav_loop(job['filename']) * 32768/32767
+            for job in jobs}
+
+# draws a contact sheet for every oscillator in funcs into graphPath/osc_saw.png (or .svg). banks is {osc: {filename: samples}}
+# for banks that are already rendered (see written_bank), anything not in it is rendered with render_bank.
+# with more than one process the sheets are drawn in parallel
+@profiled()
+def write_contact_sheets(funcs, sheetFormat='png', graphPath='graphs', processes=1, banks=None):
+    os.makedirs(graphPath, exist_ok=True)
+    banks = banks or {}
+    sheets = [(func.__name__, banks[func.__name__] if func.__name__ in banks else render_bank(func), os.path.join(graphPath, func.__name__+'.'+sheetFormat))
+              for func in funcs]
+    if processes == 1 or len(sheets) == 1:
+        sheetPaths = [draw_contact_sheet(*sheet) for sheet in sheets]
+    else:
+        with ProcessPoolExecutor(max_workers=processes or None) as pool:
+            sheetPaths = list(pool.map(draw_contact_sheet, *zip(*sheets)))
+    for sheetPath in sheetPaths:
+        print('GRAPHED: '+sheetPath)
+    return sheetPaths
+
 # Oscillator Design/ Debugging Graph Generation
+@profiled(lambda args: args[0])
 def printGraphs(path):
+    # only needed for signal design and debugging, so they're only imported when graphs are asked for
+    from scipy.io.wavfile import read
+    import matplotlib.pyplot as plt
     print('in printgraphs '+os.getcwd())
     filesToPlot = os.listdir(path)
     filesToPlot.sort(key=lambda x: os.path.getmtime(path+'/'+x))
@@ -556,35 +1490,991 @@ def printGraphs(path):
 
 
 #######################
-# .Wav File Generation
+# Mipmapped Wavetables
 #######################
-allOscillators = [func for func in list(oscillators.__dict__.keys()) if callable(getattr(oscillators(), func)) and not func.startswith("__")]
-for osc in allOscillators:
-    if os.path.exists(osc) and os.path.isdir(osc): #delete chords & export dir if they already exist
-        shutil.rmtree(osc)
-        print('deleted '+osc+' folder')
-
-for oscToGen in oscList:
-    digiProNum = 0
-    try:
-        func = getattr(oscillators, oscToGen)
-    except AttributeError:
-        raise NotImplementedError("No signal `{}` in oscillators class".format(oscToGen))
-    write_all_chords(func)
-    if printGraphsFlag == 1:
-        printGraphs(func.__name__)
-    chordWavsGenerated = digiProNum # gets number of files generated before appending pre-exising files
-    if appendUserFilesFlag == 1:
-        append_user_files(func,addendumPath)
-
-write_all_unison()
-#printGraphs(uniPath)
-
-if len(oscList) != 0:
+# turns loops of the same length into mipmaps, as a chords x levels x samples array. every loop's spectrum is taken once and level L
+# only keeps the bins that stay under nyquist when the table is played L octaves up, so no level is synthesized again.
+# level 0 is the loop itself
+def mipmap_levels(loops, octaves):
+    loops = np.array(loops, dtype=float)
+    length = loops.shape[-1]
+    spectra = np.fft.rfft(loops, axis=-1)
+    cutoffs = length/2 / 2.0**np.arange(octaves+1)
+    keep = np.arange(spectra.shape[-1]) < cutoffs[:, None] # levels x bins
+    levels = np.fft.irfft(spectra[:, None, :] * keep, length, axis=-1)
+    levels[:, 0] = loops
+    return levels
+
+# every chord write_all_chords would generate for osc as {filename: levels x samples array}, in slot order.
+# loops of the same length go through mipmap_levels together
+def render_mipmaps(osc, octaves=None, chordList=None, f0=None, sampleRate=None):
+    octaves = mipmapOctaves if octaves is None else octaves
+    bank = render_bank(osc, chordList, f0, sampleRate)
+    groups = {}
+    for filename, samples in bank.items():
+        groups.setdefault(len(samples), []).append(filename)
+    for filenames in groups.values():
+        for filename, levels in zip(filenames, mipmap_levels([bank[filename] for filename in filenames], octaves)):
+            bank[filename] = levels
+    return bank
+
+# writes every chord of func as one .wav into /Mipmaps/osc_saw/, the levels one after another with the full band level first
+@profiled(lambda args: args[0].__name__)
+def write_mipmaps(func, octaves=None):
+    oscPath = os.path.join(mipmapPath, func.__name__)
+    if os.path.isdir(oscPath):
+        shutil.rmtree(oscPath)
+    os.makedirs(oscPath)
+    mipmaps = render_mipmaps(func, octaves)
+    with backgroundWriter(writerThreads, writeQueueSize) as writer:
+        for job in plan_chords(func, False, verbose=False):
+            writer.write(dict(job, filename=os.path.join(mipmapPath, job['filename'])), mipmaps[job['filename']].ravel())
+
+
+#######################
+# Library API
+#######################
+# looks up an oscillator by name ('osc_saw' or just 'saw'), functions from either oscillator class are passed through
+# oscillators are looked up in oscGraphs. the one from the oscillators class is returned if there is one, graphs without one
+# get their graph_oscillator stand-in
+def get_oscillator(osc):
+    if callable(osc):
+        osc = osc.__name__
+    if not osc.startswith('osc_'):
+        osc = 'osc_'+osc
+    if osc not in oscGraphs:
+        raise NotImplementedError("No signal `{}` in oscGraphs".format(osc))
+    return getattr(oscillators, osc, None) or graph_oscillator(osc)
+
+# one loop of a chord as an array of floats between -1 and 1. f0 defaults to F0 / ratios[0] like the chord banks
+def render_chord(osc, ratios, f0=None, sampleRate=None):
+    return render_cycle(f0 or F0 / ratios[0], ratios, get_oscillator(osc), sampleRate)
+
+# every chord, inversion & octave write_all_chords would generate for osc, as {filename: samples} in slot order.
+# chordList defaults to the chord array the current settings pick, normalized if normalizeChords is on
+def render_bank(osc, chordList=None, f0=None, sampleRate=None):
+    func = get_oscillator(osc)
+    jobs = plan_chords(func, False, chordList, f0, verbose=False)
+    return {job['filename']: samples for job, samples in iter_gain_stage(iter_render_jobs(jobs, func, sampleRate))}
+
+
+#######################
+# Audio Previews
+#######################
+# every voicing write_all_chords would make of one chord from the chord array, as {'maj0': job, 'maj1': job...}.
+# chordName is the name in the array without the padding, ie: '7' for '7  '
+def chord_voicings(osc, chordName):
+    func = get_oscillator(osc)
+    for chord in active_chords():
+        if chord[0].strip() == chordName.strip():
+            jobs = plan_chords(func, False, [chord], verbose=False)
+            return {os.path.splitext(os.path.basename(job['filename']))[0]: job for job in jobs}
+    raise KeyError('no chord named {!r} in the chord array'.format(chordName))
+
+# one loop of a voicing as 16 bit samples, exactly what would be written to its .wav. voicing is a name from chord_voicings,
+# the root position by default
+def preview_table(osc, chordName, voicing=None, sampleRate=None):
+    voicings = chord_voicings(osc, chordName)
+    job = voicings[voicing] if voicing else next(iter(voicings.values()))
+    func = get_oscillator(osc)
+    return quantize_cycle(next(iter_gain_stage(iter_render_jobs([job], func, sampleRate)))[1])
+
+# loops a 16 bit table forever (or for seconds) as blocks of blockFrames samples. the table is tiled once into a buffer one
+# block longer than itself, so every block is a view into that buffer starting wherever the last one stopped and nothing is
+# copied while streaming. blocks are only valid until the next one is asked for if the caller keeps them around
+def stream_loop(table, seconds=None, blockFrames=1024, sampleRate=None):
+    period = len(table)
+    buffer = np.tile(table, ceil((period + blockFrames) / period))
+    remaining = int(seconds * (sampleRate or SAMPLE_RATE)) if seconds is not None else None
+    phase = 0
+    while remaining is None or remaining > 0:
+        frames = blockFrames if remaining is None else min(blockFrames, remaining)
+        yield buffer[phase:phase+frames]
+        phase = (phase + frames) % period
+        if remaining is not None:
+            remaining -= frames
+
+# streams a voicing of a chord as looped 16 bit blocks without writing anything
+def stream_chord(osc, chordName, voicing=None, seconds=None, blockFrames=1024, sampleRate=None):
+    return stream_loop(preview_table(osc, chordName, voicing, sampleRate), seconds, blockFrames, sampleRate)
+
+# plays every voicing of each chord in chordNames one after another for seconds each, as raw 16 bit little endian mono PCM
+# into output (stdout by default) for piping into a player. what's playing is printed to stderr so it doesn't end up in the audio.
+# a name can also be a single voicing like 'maj1'
+def pipe_preview(osc, chordNames, seconds=2, output=None):
+    output = output or sys.stdout.buffer
+    voicings = {chord[0].strip(): chord_voicings(osc, chord[0]) for chord in active_chords()}
+    for chordName in chordNames:
+        if chordName in voicings:
+            toPlay = [(chordName, voicing) for voicing in voicings[chordName]]
+        else:
+            toPlay = [(name, voicing) for name, chordVoicings in voicings.items() for voicing in chordVoicings if voicing == chordName]
+            if not toPlay:
+                raise KeyError('no chord or voicing named {!r}'.format(chordName))
+        for name, voicing in toPlay:
+            print('PLAYING: '+get_oscillator(osc).__name__+' '+voicing+'  '+str(voicings[name][voicing]['ratios']), file=sys.stderr)
+            for block in stream_chord(osc, name, voicing, seconds):
+                output.write(memoryview(block))
+    output.flush()
+
+
+#############################
+# DigiPro SysEx Export
+#############################
+# writes a bank straight to a DigiPro .syx file so it can be sent to the MnM without the C6 conversion step.
+# each wave is one sysex message in Elektron's usual envelope: header, wave id, slot, 4 letter name, the loop resampled to
+# digiProWaveLength 16 bit samples packed into 7 bit MIDI bytes, then a 14 bit checksum & length.
+# the wave id, length & checksum follow rumblesan's notes on the format, not C6 itself, so check_digipro_reference has to rebuild
+# a real C6 dump (digiProReference) byte for byte before anything gets exported
+digiProHeader = bytes([0xF0, 0x00, 0x20, 0x3C, 0x03, 0x00]) # sysex start, Elektron's manufacturer id, Monomachine, device id
+digiProWaveId = 0x5D
+digiProWaveLength = 1024
+digiProSlots = 64
+
+# Elektron's 7 bit packing: every 7 bytes are sent as 8, the first one holding the top bit of the other 7
+def encode_7bit(data):
+    packed = bytearray()
+    for i in range(0, len(data), 7):
+        chunk = data[i:i+7]
+        packed.append(sum(((byte >> 7) & 1) << (6-j) for j, byte in enumerate(chunk)))
+        packed.extend(byte & 0x7F for byte in chunk)
+    return bytes(packed)
+
+def decode_7bit(packed):
+    data = bytearray()
+    for i in range(0, len(packed), 8):
+        msbs = packed[i]
+        data.extend(byte | (((msbs >> (6-j)) & 1) << 7) for j, byte in enumerate(packed[i+1:i+8]))
+    return bytes(data)
+
+# stretches or squeezes one loop to length samples by cutting or zero padding its spectrum, so nothing new aliases
+def resample_loop(samples, length):
+    spectrum = np.fft.rfft(samples)
+    resized = np.zeros(length//2+1, dtype=complex)
+    bins = min(len(spectrum), len(resized))
+    resized[:bins] = spectrum[:bins]
+    if length % 2 == 0 and bins == len(resized):
+        resized[-1] = resized[-1].real # the nyquist bin of an even length loop has to be real
+    return np.fft.irfft(resized, length) * length / len(samples)
+
+# the 4 letter name C6 shows on the MnM: the first three and last character of the file name
+def digipro_name(filename):
+    name = os.path.splitext(os.path.basename(filename))[0]
+    name = (name[:3]+name[-1:] if len(name) > 4 else name).upper().replace('¥', '%') # the MnM shows ¥ as a percent sign anyway
+    return name.encode('ascii', 'replace').ljust(4)[:4]
+
+# a loop as the big endian 16 bit wave a DigiPro message carries
+def digipro_wave(samples):
+    return quantize_cycle(resample_loop(samples, digiProWaveLength)).astype('>i2').tobytes()
+
+# one wave message from its slot, 4 letter name & wave bytes
+def digipro_wave_message(slot, name, wave):
+    data = encode_7bit(name + wave)
+    checksum = sum(data) & 0x3FFF
+    return (digiProHeader + bytes([digiProWaveId, slot & 0x7F]) + data +
+            bytes([checksum >> 7, checksum & 0x7F, (len(data) >> 7) & 0x7F, len(data) & 0x7F, 0xF7]))
+
+def digipro_message(slot, filename, samples):
+    return digipro_wave_message(slot, digipro_name(filename), digipro_wave(samples))
+
+# splits sysex data into its messages, each one from F0 to F7
+def sysex_messages(data):
+    return [message+b'\xf7' for message in data.split(b'\xf7') if message.startswith(b'\xf0')]
+
+# returns [(slot, name, wave)] for every DigiPro wave message in data, with name & wave as the raw bytes the message carries
+def parse_digipro_syx(data):
+    prefix = digiProHeader + bytes([digiProWaveId])
+    waves = []
+    for message in sysex_messages(data):
+        if message.startswith(prefix) and len(message) > len(prefix)+6:
+            decoded = decode_7bit(message[len(prefix)+1:-5])
+            waves.append((message[len(prefix)], decoded[:4], decoded[4:]))
+    return waves
+
+# returns [(slot, name, samples)] for every DigiPro wave message in a .syx file
+def read_digipro_syx(syxPath):
+    with open(syxPath, 'rb') as syxFile:
+        waves = parse_digipro_syx(syxFile.read())
+    return [(slot, name.decode('ascii', 'replace'), np.frombuffer(wave[:len(wave)//2*2], dtype='>i2') / 32767) for slot, name, wave in waves]
+
+# what's wrong with the wave bytes of a DigiPro message, or None if they're what digipro_wave writes: digiProWaveLength big endian
+# 16 bit samples that come back out of digipro_wave within a step of where they were. the loop also has to move like a wave
+# from one sample to the next, since samples in the other byte order read as big endian ones come out as noise
+def digipro_wave_problem(wave):
+    if len(wave) != 2*digiProWaveLength:
+        return '{} bytes of wave instead of {}'.format(len(wave), 2*digiProWaveLength)
+    samples = np.frombuffer(wave, dtype='>i2').astype(float)
+    again = np.frombuffer(digipro_wave(samples/32767), dtype='>i2')
+    if np.abs(again - np.clip(samples, -32767, 32767)).max() > 1:
+        return 'the samples change when they go back through digipro_wave'
+    swing = np.abs(samples - samples.mean()).mean()
+    if swing == 0:
+        return 'the wave is silent, so its byte order can\'t be checked'
+    if np.abs(np.diff(samples)).mean() > 0.5*swing:
+        return 'the samples jump around like noise, they\'re probably in another byte order'
+    return None
+
+# makes sure the layout above is the one C6 really sends before a single byte goes to the MnM: every message in referencePath
+# (a .syx of one or more waves sent from C6, not noise) has to come back out of digipro_wave_message byte for byte from its own
+# slot, name & wave, and its wave has to pass digipro_wave_problem.
+# raises ValueError if there's no reference or anything in it doesn't match, returns how many messages were checked
+def check_digipro_reference(referencePath=None):
+    referencePath = referencePath or digiProReference
+    if not referencePath or not os.path.isfile(referencePath):
+        raise ValueError('the DigiPro export needs a .syx sent from C6 to check its layout against first, set digiProReference or --syx-reference')
+    with open(referencePath, 'rb') as syxFile:
+        messages = sysex_messages(syxFile.read())
+    if not messages:
+        raise ValueError(referencePath+' has no sysex messages in it')
+    for number, message in enumerate(messages, 1):
+        waves = parse_digipro_syx(message)
+        if len(waves) != 1 or digipro_wave_message(*waves[0]) != message:
+            raise ValueError('message {} of {} isn\'t laid out the way the DigiPro export writes them, nothing was exported'.format(number, referencePath))
+        problem = digipro_wave_problem(waves[0][2])
+        if problem:
+            raise ValueError('message {} of {}: {}, nothing was exported'.format(number, referencePath, problem))
+    return len(messages)
+
+# turns the frames of an 8, 16, 24 or 32 bit .wav into floats between -1 and 1 in one go, more than one channel is mixed down
+def pcm_to_float(frames, width, channels=1):
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8) - 128.0) / 128
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype='<i2') / 32768
+    elif width == 3:
+        packed = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = (((packed[:, 0] | packed[:, 1] << 8 | packed[:, 2] << 16) << 8) >> 8) / 8388608 # sign extend the top byte
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype='<i4') / 2147483648
+    else:
+        raise ValueError('{} bit .wav files aren\'t supported'.format(8*width))
+    return samples.reshape(-1, channels).mean(axis=1)
+
+# reads a .wav as floats between -1 and 1, stereo is mixed down
+def read_wav_loop(wavPath):
+    with wave.open(wavPath, 'rb') as wav:
+        channels, width, frames = wav.getnchannels(), wav.getsampwidth(), wav.readframes(wav.getnframes())
+    return pcm_to_float(frames, width, channels)
+
+# the (name, wave) a user file adds to a .syx bank, or None if it can't go in one. .wavs are converted, .syx files have to hold
+# exactly one DigiPro wave message with a wave digipro_wave_problem is happy with, which gets rebuilt for the slot it lands in
+# instead of the one it was dumped from
+def digipro_user_wave(filename, entry):
+    if entry['kind'] == '.syx':
+        waves = parse_digipro_syx(entry['data'])
+        if len(waves) == 1 and len(sysex_messages(entry['data'])) == 1 and digipro_wave_problem(waves[0][2]) is None:
+            return waves[0][1:]
+    elif entry['samples'] is not None:
+        return digipro_name(filename), digipro_wave(entry['samples'])
+    return None
+
+# renders the bank write_all_chords plans for func (or jobs, if it's already planned) and streams it wave by wave into syxPath
+# in slot order, with the user files from addendumPath after it. nothing is written until the layout has been checked against
+# referencePath (see check_digipro_reference), and the MnM only has digiProSlots slots so a bank that doesn't fit is refused
+def export_digipro(func, syxPath=None, addendumPath=None, jobs=None, referencePath=None):
+    syxPath = syxPath or func.__name__+'.syx'
+    check_digipro_reference(referencePath)
+    if jobs is None:
+        jobs = plan_chords(func, False, verbose=False)
+    addenda = []
+    for filename, entry in (user_file_names(func, load_user_files(addendumPath), jobs) if addendumPath else []):
+        userWave = digipro_user_wave(filename, entry)
+        if userWave is None:
+            print('SKIPPED "'+entry['source']+'": only .wavs & .syx files holding one DigiPro wave can go in a .syx bank')
+        else:
+            addenda.append(userWave)
+    if len(jobs) + len(addenda) > digiProSlots:
+        raise ValueError('{} has {} chords and {} user files, only {} fit in a DigiPro bank'.format(func.__name__, len(jobs), len(addenda), digiProSlots))
+    with open(syxPath, 'wb') as syxFile:
+        for job, samples in iter_gain_stage(iter_render_jobs(jobs, func)):
+            syxFile.write(digipro_message(job['slot'], job['filename'], samples))
+        for slot, (name, wave) in enumerate(addenda, len(jobs)):
+            syxFile.write(digipro_wave_message(slot, name, wave))
+    print('EXPORTED: '+syxPath+'  '+str(len(jobs)+len(addenda))+' waves')
+    return syxPath
+
+
+#############################
+# Wavetable Container
+#############################
+# a whole bank in one file: an 8 byte magic, the version & length of a json index as 2 little endian uint32s, the index padded to
+# a multiple of 64 bytes, then one frame of frameLength float32s per slot. frames are the native loop resampled to frameLength,
+# so every chord can be found by its slot number alone and read through a memory map without touching the rest of the file
+wavetableMagic = b'MNMSCCWT'
+wavetableVersion = 1
+
+def wavetable_entry(job):
+    return {'name': os.path.splitext(os.path.basename(job['filename']))[0], 'filename': job['filename'], 'ratios': job['ratios'],
+            'f0': job['f0'], 'period': job['period']}
+
+# writes the header for entries and makes the file its full size up front, returns the frames as a writable memory map
+def create_wavetable(wtPath, index):
+    header = json.dumps(index).encode()
+    header += b' ' * (-(len(wavetableMagic) + 8 + len(header)) % 64)
+    dataOffset = len(wavetableMagic) + 8 + len(header)
+    shape = (len(index['slots']), index['frameLength'])
+    with open(wtPath, 'wb') as wtFile:
+        wtFile.write(wavetableMagic + np.array([wavetableVersion, len(header)], dtype='<u4').tobytes() + header)
+        wtFile.truncate(dataOffset + shape[0]*shape[1]*4)
+    if not shape[0]:
+        return np.zeros(shape, dtype='<f4')
+    return np.memmap(wtPath, dtype='<f4', mode='r+', offset=dataOffset, shape=shape)
+
+# packs the (job, samples) pairs for planned jobs into wtPath. the index comes from the plan (every job already knows its loop
+# length), so the file is laid out before anything renders and each loop is resampled straight into its slot as it arrives
+def pack_wavetable(wtPath, jobs, pairs, osc, frameLength=None, sampleRate=None):
+    index = {'osc': osc, 'sampleRate': sampleRate or SAMPLE_RATE, 'frameLength': frameLength or wavetableFrameLength,
+             'slots': [wavetable_entry(job) for job in jobs]}
+    frames = create_wavetable(wtPath, index)
+    for job, samples in pairs:
+        frames[job['slot']] = resample_loop(samples, index['frameLength'])
+        add_stat('samples', index['frameLength'])
+    if isinstance(frames, np.memmap):
+        frames.flush()
+    add_stat('bytes', os.path.getsize(wtPath))
+    print('PACKED: '+wtPath+'  '+str(len(jobs))+' waves')
+    return wtPath
+
+# packs the bank write_all_chords plans for func (or jobs, if it's already planned) into one file, osc_saw.wt by default
+@profiled(lambda args: args[0].__name__)
+def write_wavetable(func, wtPath=None, frameLength=None, jobs=None):
+    if jobs is None:
+        jobs = plan_chords(func, False, verbose=False)
+    return pack_wavetable(wtPath or func.__name__+'.wt', jobs, iter_gain_stage(iter_render_jobs(jobs, func)), func.__name__, frameLength)
+
+# packs every unison wave into 'Unison Waves.wt'
+@profiled(lambda args: uniPath)
+def write_unison_wavetable(wtPath=None, frameLength=None):
+    jobs = plan_unison(verbose=False)
+    pairs = ((job, render_cycle(job['f0'], job['ratios'], get_oscillator(job['osc']))) for job in jobs)
+    return pack_wavetable(wtPath or uniPath+'.wt', jobs, iter_gain_stage(pairs), uniPath, frameLength)
+
+# returns (index, frames) for a wavetable file, frames is {name: frame} in slot order. every frame is a read only view
+# into one memory map of the file, so nothing is read from disk until a frame is actually used
+def read_wavetable(wtPath):
+    with open(wtPath, 'rb') as wtFile:
+        magic = wtFile.read(len(wavetableMagic))
+        if magic != wavetableMagic:
+            raise ValueError('{} is not a wavetable file'.format(wtPath))
+        version, headerLength = np.frombuffer(wtFile.read(8), dtype='<u4')
+        if version > wavetableVersion:
+            raise ValueError('{} is version {}, only up to {} can be read'.format(wtPath, version, wavetableVersion))
+        index = json.loads(wtFile.read(int(headerLength)))
+    shape = (len(index['slots']), index['frameLength'])
+    if not shape[0]:
+        return index, {}
+    table = np.memmap(wtPath, dtype='<f4', mode='r', offset=len(wavetableMagic) + 8 + int(headerLength), shape=shape)
+    return index, {entry['name']: table[slot] for slot, entry in enumerate(index['slots'])}
+
+
+#############################
+# Waveform Checks
+#############################
+# what every wave has to stay inside to pass. seamRatio is the jump from the last sample back to the first over the biggest
+# jump inside the loop, dc is the mean, peak is the largest sample (anything past 1 gets clipped when it's written), clipped
+# counts samples that land on the 16 bit rails (a sine can touch +1 & -1 once each) and aliasEnergy is the share of the
+# spectrum that isn't a harmonic of any note in the chord, which is where anything above nyquist folds back to
+verifyLimits = {'seamRatio': 1.5, 'dc': 0.01, 'peak': 1.0, 'clipped': 2, 'aliasEnergy': 0.001}
+
+# measures a list of loops. loops of the same length are stacked into one waves x samples matrix so every check is one array
+# expression per length. ratioLists gives each loop's chord so its harmonics are known, None skips the alias check for that loop
+def wave_metrics(waves, ratioLists=None):
+    ratioLists = ratioLists or [None]*len(waves)
+    metrics = [None]*len(waves)
+    groups = {}
+    for i, samples in enumerate(waves):
+        groups.setdefault(len(samples), []).append(i)
+    for length, members in groups.items():
+        matrix = np.array([waves[i] for i in members], dtype=float)
+        seam = np.abs(matrix[:, 0] - matrix[:, -1])
+        maxStep = np.abs(np.diff(matrix, axis=1)).max(axis=1, initial=0)
+        seamRatio = np.divide(seam, maxStep, out=np.where(seam > 0, np.inf, 0.0), where=maxStep > 0)
+        peak = np.abs(matrix).max(axis=1)
+        power = np.abs(np.fft.rfft(matrix, axis=1))**2
+        power[:, 0] = 0 # dc is checked on its own
+        chords = [ratioLists[i] or [1] for i in members]
+        widest = max(len(ratios) for ratios in chords)
+        ratioMatrix = np.array([list(ratios) + [ratios[0]]*(widest-len(ratios)) for ratios in chords], dtype=float)
+        harmonic = (np.arange(power.shape[1]) % ratioMatrix[:, :, None] == 0).any(axis=1) # note r of a chord sits on bin r of its loop
+        aliasEnergy = (power*~harmonic).sum(axis=1) / np.maximum(power.sum(axis=1), 1e-30)
+        for row, i in enumerate(members):
+            metrics[i] = {
+                'samples': length, 'seam': float(seam[row]), 'seamRatio': float(seamRatio[row]), 'dc': float(matrix[row].mean()),
+                'peak': float(peak[row]), 'headroomDb': float(-20*np.log10(peak[row])) if peak[row] > 0 else None,
+                'clipped': int((np.abs(matrix[row]) >= 1).sum()),
+                'aliasEnergy': float(aliasEnergy[row]) if ratioLists[i] is not None else None,
+            }
+    return metrics
+
+# every metric of one wave that's past its limit, as {'file', 'check', 'value', 'limit'}
+def wave_failures(name, metrics, limits=None):
+    failures = []
+    for check, limit in (limits or verifyLimits).items():
+        value = metrics.get(check)
+        if value is not None and abs(value) > limit:
+            failures.append({'file': name, 'check': check, 'value': value, 'limit': limit})
+    return failures
+
+# checks an in-memory bank ({filename: samples} like render_bank returns) and returns (reports, failures) with one report per wave
+def verify_waves(bank, ratioLists=None, limits=None):
+    names = list(bank)
+    reports = [dict(metrics, file=name) for name, metrics in zip(names, wave_metrics([bank[name] for name in names], ratioLists))]
+    return reports, [failure for report in reports for failure in wave_failures(report['file'], report, limits)]
+
+# renders and checks one oscillator's bank without writing anything
+def verify_bank(osc, chordList=None, f0=None, sampleRate=None, limits=None):
+    func = get_oscillator(osc)
+    jobs = plan_chords(func, False, chordList, f0, verbose=False)
+    bank = {job['filename']: samples for job, samples in iter_gain_stage(iter_render_jobs(jobs, func, sampleRate))}
+    return verify_waves(bank, [job['ratios'] for job in jobs], limits)
+
+# reads and checks a list of .wav files, this is what each process in verify_tree runs on its share of the files.
+# the loops are scaled back up by 32768/32767 so a sample quantize_cycle clipped to the rail reads back as exactly 1 again
+def verify_files(wavPaths, ratioLists=None, limits=None):
+    return verify_waves({wavPath: read_wav_loop(wavPath) * 32768/32767 for wavPath in wavPaths}, ratioLists, limits)
+
+# checks every .wav in the oscillator folders of oscList and /Unison Waves/ (or in paths), spread over processes like workerProcesses.
+# files the current settings would write are checked against their chord's harmonics, anything else (user files) skips the alias check.
+# writes {'waves': reports, 'failures': failures} to jsonPath if it's given and returns the failures
+def verify_tree(paths=None, processes=1, jsonPath=None, limits=None):
+    paths = paths or oscList + [uniPath]
+    planned = {}
+    for jobs in [plan_chords(get_oscillator(osc), False, verbose=False) for osc in oscList] + [plan_unison(verbose=False)]:
+        planned.update((os.path.normpath(job['filename']), job['ratios']) for job in jobs)
+    wavPaths = sorted(os.path.join(root, name) for path in paths for root, dirs, names in os.walk(path) for name in names if name.lower().endswith('.wav'))
+    ratioLists = [planned.get(os.path.normpath(wavPath)) for wavPath in wavPaths]
+    workers = min(processes or os.cpu_count(), len(wavPaths))
+    if workers <= 1:
+        reports, failures = verify_files(wavPaths, ratioLists, limits)
+    else:
+        size = ceil(len(wavPaths)/workers) # whole runs of files in order, so each process still gets loops of the same length together
+        chunks = [(wavPaths[i:i+size], ratioLists[i:i+size], limits) for i in range(0, len(wavPaths), size)]
+        reports, failures = [], []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunkReports, chunkFailures in pool.map(verify_files, *zip(*chunks)):
+                reports += chunkReports
+                failures += chunkFailures
+    for failure in failures:
+        print('FAILED: '+failure['file']+'  '+failure['check']+' '+'%.4g' % failure['value']+' (limit '+'%g' % failure['limit']+')')
+    print(str(len(reports))+' waves checked, '+str(len(failures))+' failures')
+    if jsonPath:
+        with open(jsonPath, 'w') as jsonFile:
+            json.dump({'limits': limits or verifyLimits, 'waves': reports, 'failures': failures}, jsonFile, indent=1)
+        print('verify report written to '+jsonPath)
+    return failures
+
+
+#############################
+# Sample Rate / F0 Sweep
+#############################
+def setting_name(sampleRate, f0):
+    return 'sr%g_f0%g' % (sampleRate, f0)
+
+# renders the chords in chordList for every oscillator in oscNames at every sample rate & F0 combination, into
+# sweepPath/sr48005_f0440/osc_saw/... one folder per setting. the chord plan for each F0 is made once and shared by every
+# sample rate. returns one summary row per setting with the loop lengths and how far rounding the loop put each chord out of tune
+def sweep_settings(sampleRates, f0s, oscNames=None, chordList=None, sweepPath='sweep'):
+    funcs = [get_oscillator(osc) for osc in oscNames or oscList]
+    rows = []
+    for f0 in f0s:
+        plans = [(func, plan_chords(func, False, chordList, f0, verbose=False)) for func in funcs]
+        if not any(jobs for func, jobs in plans): # nothing to render, so there'd be no loop lengths to sum up either
+            raise ValueError('nothing to sweep: '+('no oscillators were picked' if not funcs else 'none of the chords picked are in the chord array'))
+        for sampleRate in sampleRates:
+            settingPath = os.path.join(sweepPath, setting_name(sampleRate, f0))
+            periods = []
+            centsErrors = []
+            for func, jobs in plans:
+                os.makedirs(os.path.join(settingPath, func.__name__), exist_ok=True)
+                for job, samples in iter_gain_stage(iter_render_jobs(jobs, func, sampleRate)):
+                    filename = os.path.join(settingPath, job['filename'])
+                    write_wav(filename, samples, sampleRate)
+                    os.utime(filename,(0,baseEpoch+epochInc * job['slot']))
+                    loopF0, period = cycle_length(job['f0'], sampleRate)
+                    periods.append(period)
+                    centsErrors.append(abs(1200*log2(loopF0/job['f0'])))
+            rows.append({'setting': setting_name(sampleRate, f0), 'sampleRate': sampleRate, 'F0': f0, 'files': len(periods),
+                         'minPeriod': min(periods), 'maxPeriod': max(periods),
+                         'maxCentsError': max(centsErrors), 'meanCentsError': sum(centsErrors)/len(centsErrors)})
+            print('swept '+settingPath)
+    print_sweep_summary(rows, sweepPath)
+    return rows
+
+def print_sweep_summary(rows, sweepPath):
+    columns = ['setting', 'files', 'minPeriod', 'maxPeriod', 'maxCentsError', 'meanCentsError']
     print(spacer)
-    print('Oscillators generated: '+ str(oscList))
-    print (str(len(chords)) + ' chord types')
-    print (str(chordWavsGenerated) + ' chords generated per oscillator')# prints number of chords in folder/length of digipronum before files are appended
-    print(str(len(os.listdir(addendumPath)))+' files added from /'+addendumPath+'/')
-    print(str(chordWavsGenerated+len(os.listdir(addendumPath)))+' files per oscillator to export to C6, must be below 64 for MnM')
+    print(''.join(column.ljust(18) for column in columns))
+    for row in rows:
+        print(''.join(('%.4f' % row[column] if isinstance(row[column], float) else str(row[column])).ljust(18) for column in columns))
     print(spacer)
+    with open(os.path.join(sweepPath, 'summary.csv'), 'w', newline='') as summaryFile:
+        writer = csv.DictWriter(summaryFile, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+#######################
+# Benchmarks
+#######################
+benchmarkNoiseFloor = 0.3 # no timing is trusted to be steadier than 30% between runs, however steady its repeats were
+
+# (seconds per call, noise) for run(). it's called once to warm up, then timeit's autorange finds how many calls take at least
+# 0.2 seconds, so quick calls aren't lost in the timer's resolution. the time is the best of repeats of those loops,
+# noise is how far the median loop was from the best one (0.1 = 10% slower), which compare_benchmarks allows for
+def best_time(run, repeats):
+    timer = timeit.Timer(run)
+    timer.timeit(1)
+    number = timer.autorange()[0]
+    loops = sorted(timer.repeat(repeats, number))
+    return loops[0] / number, loops[len(loops)//2] / loops[0] - 1
+
+# the noise that goes with a timing in the benchmark results
+def noise_name(name):
+    return 'noise' if name == 'seconds' else name.replace('NsPerSample', 'Noise')
+
+# nanoseconds per sample for every oscillator, with both the array engine and the scalar reference
+def bench_oscillators(repeats=3, samples=48000):
+    partials = int(SAMPLE_RATE/2/F0)
+    x = np.arange(samples)*pi*2/SAMPLE_RATE*F0
+    results = {}
+    for oscName in allOscillators:
+        vecFunc = vector_oscillator(oscName)
+        func = get_oscillator(oscName)
+        scalarX = x[:samples//20].tolist()
+        vectorSeconds, vectorNoise = best_time(lambda: vecFunc(x, partials), repeats)
+        scalarSeconds, scalarNoise = best_time(lambda: [func(v, partials) for v in scalarX], repeats)
+        results[oscName] = {
+            'vectorNsPerSample': vectorSeconds / samples * 1e9, 'vectorNoise': vectorNoise,
+            'scalarNsPerSample': scalarSeconds / len(scalarX) * 1e9, 'scalarNoise': scalarNoise,
+        }
+    return results
+
+# seconds to render one loop of every chord in the chord array with the current engine, next to its note & partial counts
+def bench_chords(osc='osc_saw', repeats=3):
+    func = get_oscillator(osc)
+    results = {}
+    for chord in active_chords():
+        ratios = chord[1]
+        f0 = F0 / ratios[0]
+        loopF0, period = cycle_length(f0)
+        seconds, noise = best_time(lambda: render_cycle_uncached(f0, ratios, func), repeats)
+        results[chord[0]] = {
+            'osc': func.__name__, 'ratios': len(ratios), 'period': period,
+            'partials': sum(int(SAMPLE_RATE/2/(loopF0*r)) for r in ratios),
+            'seconds': seconds, 'noise': noise,
+        }
+    return results
+
+# seconds for write_all_chords over oscList plus write_all_unison, in a throwaway folder with the output hidden
+def bench_build(repeats=3):
+    home = os.getcwd()
+    def build():
+        with tempfile.TemporaryDirectory() as buildPath, contextlib.redirect_stdout(io.StringIO()):
+            os.chdir(buildPath)
+            try:
+                for oscToGen in oscList:
+                    write_all_chords(get_oscillator(oscToGen))
+                write_all_unison()
+            finally:
+                os.chdir(home)
+    seconds, noise = best_time(build, repeats)
+    return {'oscillators': len(oscList), 'seconds': seconds, 'noise': noise}
+
+# runs every benchmark with the render cache & incremental builds off so nothing is skipped, and saves the results as json
+def run_benchmarks(jsonPath=None, repeats=3):
+    global renderCacheMB, incrementalBuild
+    settings = (renderCacheMB, incrementalBuild)
+    renderCacheMB, incrementalBuild = 0, 0
+    try:
+        results = {'settings': dict(render_settings(), F0=F0, chords=len(active_chords())),
+                   'oscillators': bench_oscillators(repeats), 'chords': bench_chords(repeats=repeats), 'build': bench_build()}
+    finally:
+        renderCacheMB, incrementalBuild = settings
+    if jsonPath:
+        with open(jsonPath, 'w') as jsonFile:
+            json.dump(results, jsonFile, indent=1)
+        print('benchmark results written to '+jsonPath)
+    return results
+
+# every timing in results that got slower than baseline by more than tolerance (0.2 = 20%) on top of twice the noise either run
+# measured for it (never less than benchmarkNoiseFloor), as a list of dicts
+def compare_benchmarks(results, baseline, tolerance=0.2):
+    def timings(section):
+        for name, values in section.items():
+            if isinstance(values, dict):
+                for metric, value in timings(values):
+                    yield name+'/'+metric, value
+            elif name == 'seconds' or name.endswith('NsPerSample'):
+                yield name, (values, section.get(noise_name(name), 0))
+    old = dict(timings({key: baseline[key] for key in ('oscillators', 'chords', 'build') if key in baseline}))
+    regressions = []
+    for metric, (value, noise) in timings({key: results[key] for key in ('oscillators', 'chords', 'build')}):
+        if metric not in old:
+            continue
+        oldValue, oldNoise = old[metric]
+        noise = max(noise, oldNoise, benchmarkNoiseFloor)
+        if value > oldValue*(1 + tolerance + 2*noise):
+            regressions.append({'metric': metric, 'baseline': oldValue, 'current': value, 'ratio': value/oldValue, 'noise': noise})
+            print('REGRESSION: '+metric+' '+'%.3g' % oldValue+' -> '+'%.3g' % value+' ('+'%.2f' % (value/oldValue)+'x, noise '+'%.2f' % noise+')')
+    print(str(len(regressions))+' benchmark regressions against the baseline')
+    return regressions
+
+# the better of two benchmark runs of the same code: the faster of each timing, with whichever is bigger of the noise either
+# run measured and the gap between the two runs, since that's noise the repeats inside one run can't see
+def best_of_benchmarks(first, second):
+    merged = {}
+    for name, values in first.items():
+        if isinstance(values, dict) and isinstance(second.get(name), dict):
+            merged[name] = best_of_benchmarks(values, second[name])
+        elif (name == 'seconds' or name.endswith('NsPerSample')) and name in second:
+            merged[name] = min(values, second[name])
+            merged[noise_name(name)] = max(first.get(noise_name(name), 0), second.get(noise_name(name), 0),
+                                           max(values, second[name]) / min(values, second[name]) - 1)
+        elif name not in merged:
+            merged[name] = values
+    return merged
+
+# runs the benchmarks & compares them with baseline. if anything looks slower everything is timed a second time and the better
+# of the two runs is compared instead, since a busy moment on the computer can hold up a whole set of repeats
+def benchmark_regressions(baseline, tolerance=0.2, jsonPath=None):
+    results = run_benchmarks(jsonPath)
+    regressions = compare_benchmarks(results, baseline, tolerance)
+    if regressions:
+        print('timing everything again to make sure those weren\'t just noise')
+        results = best_of_benchmarks(results, run_benchmarks())
+        regressions = compare_benchmarks(results, baseline, tolerance)
+        if jsonPath:
+            with open(jsonPath, 'w') as jsonFile:
+                json.dump(results, jsonFile, indent=1)
+    return regressions
+
+
+# generate_banks with the stage instrumentation on, and cProfile too if cprofilePath is given
+def profile_run(jsonPath=None, cprofilePath=None):
+    if workerProcesses != 1:
+        print('profiling only sees this process, stages run on the worker processes aren\'t recorded')
+    start_profiling()
+    profiler = cProfile.Profile() if cprofilePath else None
+    try:
+        if profiler:
+            profiler.runcall(generate_banks)
+        else:
+            generate_banks()
+    finally:
+        report = stop_profiling(jsonPath)
+        if profiler:
+            profiler.dump_stats(cprofilePath)
+            print('cProfile written to '+cprofilePath)
+    return report
+
+
+#######################
+# Watch Mode
+#######################
+# stays running, rebuilds the chord banks whenever the chord definitions change and serves them on a local preview page.
+# the oscillator kernels, harmonic tables & the render cache stay warm between edits and every rebuild is incremental,
+# so only the voicings that actually changed get rendered again
+watchState = {'builds': 0, 'changed': [], 'seconds': 0.0, 'error': None, 'watching': None}
+
+# the "Generation Controls & Chord Defintions" section of a copy of this script, run on its own, or a .json file of
+# {setting: value} like {"SAMPLE_RATE": 48005, "altChords": [["maj", [4,5,6], [1,2]]]}. returns the settings it sets
+def load_controls(controlsPath):
+    with open(controlsPath, encoding='utf-8') as controlsFile:
+        text = controlsFile.read()
+    if controlsPath.lower().endswith('.json'):
+        return json.loads(text)
+    start = text.index('# Generation Controls & Chord Defintions')
+    end = text.index('\n', text.index('\nchords = ', start) + 1)
+    controls = {}
+    exec(text[start:end], {}, controls)
+    return controls
+
+# copies the settings from load_controls onto this module. only existing settings are changed, never functions
+def apply_controls(controls):
+    global oscList, chords
+    for name, value in controls.items():
+        if name not in globals() or callable(globals()[name]):
+            raise ValueError('{} is not a setting'.format(name))
+        globals()[name] = value
+    oscList = ['osc_'+osc if not osc.startswith('osc_') else osc for osc in oscList]
+    if 'chords' not in controls and {'altChords', 'mainChords', 'altChordsFlag'} & set(controls):
+        chords = altChords if altChordsFlag == 1 else mainChords
+
+# the settings in controls that are new or different from the ones in lastControls, so a save only changes what was edited
+def changed_controls(controls, lastControls):
+    return {name: value for name, value in controls.items() if name not in lastControls or lastControls[name] != value}
+
+def read_manifest(func):
+    if not os.path.isfile(manifest_path(func)):
+        return {}
+    with open(manifest_path(func)) as manifestFile:
+        return json.load(manifestFile)
+
+# one incremental build of every bank in oscList, returns the files that were rendered again
+def rebuild_banks():
+    start = time.perf_counter()
+    changed = []
+    for osc in oscList:
+        func = get_oscillator(osc)
+        before = read_manifest(func)
+        write_all_chords(func, plan_chords(func, checkDisk=False, verbose=False))
+        changed += [filename for filename, key in read_manifest(func).items() if before.get(filename) != key]
+    watchState.update(builds=watchState['builds']+1, changed=changed, seconds=time.perf_counter()-start, error=None)
+    print('REBUILT: '+str(len(changed))+' files in '+'%.3f' % watchState['seconds']+' seconds')
+    return changed
+
+# the preview page: / lists every bank with the files from the last rebuild first, /status is watchState as json and
+# /osc_saw/maj0.wav?seconds=2 plays a file, looped for that many seconds so a single cycle is long enough to hear
+class previewHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        path = urllib.parse.unquote(url.path).strip('/')
+        if path == '':
+            self.reply(200, 'text/html; charset=utf-8', self.index_page().encode())
+        elif path == 'status':
+            self.reply(200, 'application/json', json.dumps(watchState).encode())
+        elif os.path.normpath(path).split(os.sep)[0] in oscList and '..' not in path and os.path.isfile(path):
+            samples = read_wav_loop(path) * 32768/32767
+            seconds = float(urllib.parse.parse_qs(url.query).get('seconds', ['0'])[0])
+            if seconds > 0:
+                samples = np.tile(samples, max(1, int(seconds*SAMPLE_RATE/len(samples))))
+            self.reply(200, 'audio/wav', wav_bytes(samples))
+        else:
+            self.reply(404, 'text/plain', b'not found')
+
+    def reply(self, status, contentType, body):
+        self.send_response(status)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store') # the same url plays the new version after every rebuild
+        self.end_headers()
+        self.wfile.write(body)
+
+    def index_page(self):
+        def player(filename):
+            return '<div>'+filename+' <audio controls loop src="/'+urllib.parse.quote(filename)+'?seconds=2"></audio></div>'
+        lines = ['<html><body>',
+                 '<p>build '+str(watchState['builds'])+': '+str(len(watchState['changed']))+' files in '+'%.3f' % watchState['seconds']+' s</p>']
+        if watchState['error']:
+            lines.append('<pre>'+watchState['error']+'</pre>')
+        lines += ['<h3>changed</h3>'] + [player(filename) for filename in watchState['changed']]
+        for osc in oscList:
+            lines += ['<h3>'+osc+'</h3>'] + [player(filename) for filename in read_manifest(get_oscillator(osc))]
+        return '\n'.join(lines + ['</body></html>'])
+
+    def log_message(self, *args):
+        pass
+
+def start_preview_server(port):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), previewHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print('previews on http://127.0.0.1:'+str(server.server_address[1])+'/')
+    return server
+
+# watches controlsPath (this script by default) and rebuilds after every save. a file that fails to load, like a half typed
+# chord, is reported and the last good banks stay up until the next save. only the settings that changed since the last
+# load are applied, so command line flags stay in effect until that setting is edited in the file. a .json file is
+# applied in full when watching starts, this script isn't since the program is already running with it
+def watch(controlsPath=None, port=8000, interval=0.25):
+    global incrementalBuild
+    controlsPath = controlsPath or os.path.abspath(__file__)
+    watchState['watching'] = controlsPath
+    server = start_preview_server(port) if port else None
+    lastChange = None
+    lastControls = {}
+    if not controlsPath.lower().endswith('.json'):
+        try:
+            lastControls = load_controls(controlsPath)
+        except Exception as error:
+            print('WATCH ERROR: '+repr(error))
+    print('watching '+controlsPath+', ctrl+c to stop')
+    try:
+        while True:
+            change = os.path.getmtime(controlsPath)
+            if change != lastChange:
+                try:
+                    if lastChange is not None or controlsPath.lower().endswith('.json'):
+                        controls = load_controls(controlsPath)
+                        apply_controls(changed_controls(controls, lastControls))
+                        lastControls = controls
+                    incrementalBuild = 1
+                    rebuild_banks()
+                except Exception as error:
+                    watchState['error'] = repr(error)
+                    print('WATCH ERROR: '+repr(error))
+                lastChange = change
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print('stopped watching')
+    finally:
+        if server:
+            server.shutdown()
+
+
+#######################
+# .Wav File Generation
+#######################
+# the whole program: deletes the old oscillator folders and writes every bank in oscList plus the unison waves
+def generate_banks():
+    global digiProNum
+    chordList = normalize_chords(chords, verbose=True) if normalizeChords == 1 else chords
+    print('Normalized Chord Array:'+str(chordList))
+
+    oscFuncs = [get_oscillator(oscToGen) for oscToGen in oscList]
+    # everything is planned before anything is deleted or rendered, so full banks & name clashes show up straight away.
+    # the folders are either about to be deleted or (incremental builds) overwritten in place, so there's nothing on disk to dodge
+    plans = {}
+    for func in oscFuncs:
+        with stage('plan_chords', func.__name__): # so a profiled run still counts the files that had to be renamed
+            plans[func.__name__] = plan_chords(func, checkDisk=False)
+    userFiles = load_user_files(addendumPath) if appendUserFilesFlag == 1 else []
+    summaries = [dict(plan_summary(plans[func.__name__], [filename for filename, entry in user_file_names(func, userFiles, plans[func.__name__])]), osc=func.__name__)
+                 for func in oscFuncs]
+    print_plan(summaries)
+    if digiProExport == 1: # a bank that can't be exported stops the build here, not halfway through writing the folders
+        check_digipro_reference()
+        overflowing = [summary['osc'] for summary in summaries if summary['overflow']]
+        if overflowing:
+            raise ValueError(', '.join(overflowing)+' won\'t fit in the '+str(digiProSlots)+' DigiPro slots, nothing was generated')
+
+    for osc in allOscillators:
+        if incrementalBuild == 1 and osc in oscList: # incremental builds only touch the files that changed
+            continue
+        if os.path.exists(osc) and os.path.isdir(osc): #delete chords & export dir if they already exist
+            shutil.rmtree(osc)
+            print('deleted '+osc+' folder')
+        if os.path.isfile(osc+'.manifest.json'):
+            os.remove(osc+'.manifest.json')
+
+    if workerProcesses != 1:
+        jobCounts = write_all_chords_parallel(oscFuncs, workerProcesses, plans)
+
+    sheetBanks = {} # the banks as they're written, for the contact sheets
+    for func in oscFuncs:
+        digiProNum = 0
+        rendered = {}
+        if workerProcesses == 1:
+            digiProNum = write_all_chords(func, plans[func.__name__], rendered)
+        else:
+            digiProNum = jobCounts[func.__name__]
+        if printGraphsFlag == 1 and graphFormat == 'show':
+            printGraphs(func.__name__)
+        elif printGraphsFlag == 1:
+            sheetBanks[func.__name__] = written_bank(plans[func.__name__], rendered)
+        chordWavsGenerated = digiProNum # gets number of files generated before appending pre-exising files
+        if appendUserFilesFlag == 1:
+            append_user_files(func,addendumPath, plans[func.__name__])
+        if digiProExport == 1:
+            export_digipro(func, addendumPath=addendumPath if appendUserFilesFlag == 1 else None, jobs=plans[func.__name__])
+        if wavetableExport == 1:
+            write_wavetable(func, jobs=plans[func.__name__])
+        if mipmapOctaves > 0:
+            write_mipmaps(func)
+
+    if printGraphsFlag == 1 and graphFormat != 'show':
+        write_contact_sheets(oscFuncs, graphFormat, processes=workerProcesses, banks=sheetBanks)
+
+    write_all_unison()
+    if wavetableExport == 1:
+        write_unison_wavetable()
+    #printGraphs(uniPath)
+
+    if len(oscList) != 0:
+        addendumFiles = userFiles # already scanned once for the plan
+        print(spacer)
+        print('Oscillators generated: '+ str(oscList))
+        print (str(len(chordList)) + ' chord types')
+        print (str(chordWavsGenerated) + ' chords generated per oscillator')# prints number of chords in folder/length of digipronum before files are appended
+        print(str(len(addendumFiles))+' files added from /'+addendumPath+'/')
+        print(str(chordWavsGenerated+len(addendumFiles))+' files per oscillator to export to C6, must be below 64 for MnM')
+        print(str(renderCacheStats['saved'])+' renders saved by the render cache')
+        print(spacer)
+
+
+# command line flags for the generation controls above. (flag, global it sets, type, help)
+cliSettings = [
+    ('--sample-rate', 'SAMPLE_RATE', float, 'sample rate the waves are generated at'),
+    ('--f0', 'F0', float, 'root frequency of the chords'),
+    ('--engine', 'renderEngine', str, "'vector', 'spectral' or 'scalar'"),
+    ('--workers', 'workerProcesses', int, '1 renders on this process, 0 uses every core'),
+    ('--cache-mb', 'renderCacheMB', float, 'size limit of the render cache in MB, 0 turns it off'),
+    ('--writer-threads', 'writerThreads', int, 'background threads writing files, 0 writes on the main thread'),
+    ('--write-queue', 'writeQueueSize', int, 'most rendered loops waiting to be written at once'),
+    ('--alt-chords', 'altChordsFlag', int, '1 generates the second chord array instead of the first'),
+    ('--normalize-chords', 'normalizeChords', int, '1 raises chords with a base ratio below 8 one octave'),
+    ('--inversions', 'genInversions', int, '0 turns off every inversion'),
+    ('--smart-invert', 'smartInvert', int, '1 raises inverted notes above the top of the chord'),
+    ('--custom-inversions', 'genCustomInversions', int, '1 only generates the inversions listed in each chord'),
+    ('--up-1-octave', 'genUp1Octave', int, '1 adds each chord raised 1 octave'),
+    ('--append-user-files', 'appendUserFilesFlag', int, '1 appends the files in /'+addendumPath+'/ to every bank'),
+    ('--graphs', 'printGraphsFlag', int, '1 plots every bank with matplotlib'),
+    ('--graph-format', 'graphFormat', str, "'png' or 'svg' contact sheets in /graphs/, or 'show' for interactive windows"),
+    ('--incremental', 'incrementalBuild', int, '1 only re-renders files that changed since the last run'),
+    ('--syx', 'digiProExport', int, '1 also writes each bank to a DigiPro .syx file'),
+    ('--syx-reference', 'digiProReference', str, '.syx sent from C6 that the DigiPro export has to rebuild byte for byte before it runs'),
+    ('--wavetables', 'wavetableExport', int, '1 also packs each bank into one memory mapped .wt file'),
+    ('--frame-length', 'wavetableFrameLength', int, 'samples per frame in the .wt files'),
+    ('--mipmaps', 'mipmapOctaves', int, 'octave levels above the root in each chord\'s wavetable in /'+mipmapPath+'/, 0 turns them off'),
+    ('--gain', 'gainMode', str, "'peak' or 'rms' normalizes every loop to --gain-level, 'off' keeps the 1/notes mix"),
+    ('--gain-scope', 'gainScope', str, "'chord' levels each loop on its own, 'bank' uses one gain per bank"),
+    ('--gain-level', 'gainLevel', float, 'level in dBFS the gain stage aims for'),
+    ('--soft-clip', 'softClip', int, '1 soft clips anything near full scale'),
+    ('--dither', 'dither', int, '1 adds TPDF dither when rounding to 16 bit'),
+]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generates single cycle just intonation chord waveforms for the Elektron Monomachine.')
+    parser.add_argument('--osc', nargs='+', default=oscList, help='oscillators to generate chord banks for, ie: osc_saw sqr')
+    parser.add_argument('--chords', nargs='+', help='only generate these chords from the chord array, ie: maj mj7')
+    parser.add_argument('--sweep-rates', nargs='+', type=float, help='render into sweep/ at every one of these sample rates instead of generating the banks')
+    parser.add_argument('--sweep-f0', nargs='+', type=float, help='root frequencies to sweep, defaults to --f0')
+    parser.add_argument('--profile', metavar='JSON', help='record time, samples, bytes, renames & peak memory for every stage and oscillator into a json report')
+    parser.add_argument('--cprofile', metavar='PROF', help='also dump a cProfile of the run, open it with python -m pstats or snakeviz')
+    parser.add_argument('--benchmark', metavar='JSON', help='time the oscillators, chords & a full build and save the results instead of generating')
+    parser.add_argument('--benchmark-baseline', metavar='JSON', help='compare the benchmark against an earlier results file, exits with 1 on regressions')
+    parser.add_argument('--preview', nargs='+', metavar='CHORD', help='stream every voicing of these chords (or single voicings like maj1) for the first --osc as raw 16 bit pcm to stdout instead of generating, ie: | aplay -f S16_LE -c 1 -r 44100')
+    parser.add_argument('--preview-seconds', type=float, default=2, help='how long each voicing plays for (default: %(default)s)')
+    parser.add_argument('--watch', nargs='?', const='', metavar='CONFIG', help='keep running and rebuild whatever changed every time the chord definitions in this script (or a .json config) are saved')
+    parser.add_argument('--port', type=int, default=8000, help='port for the watch mode preview page, 0 turns it off (default: %(default)s)')
+    parser.add_argument('--plan', nargs='?', const='', metavar='JSON', help='plan every bank and print its size, overflows & name collisions without rendering anything, optionally saving every job to a json file')
+    parser.add_argument('--verify', nargs='?', const='', metavar='JSON', help='check the generated waves for loop seams, dc offset, clipping & aliasing instead of generating, optionally saving a json report. exits with 1 on failures')
+    parser.add_argument('--benchmark-tolerance', type=float, default=0.2, help='how much slower a timing can get before it counts as a regression (default: %(default)s)')
+    for flag, setting, settingType, helpText in cliSettings:
+        parser.add_argument(flag, dest=setting, type=settingType, default=globals()[setting], help=helpText+' (default: %(default)s)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global oscList, chords
+    args = parse_args(argv)
+    for flag, setting, settingType, helpText in cliSettings:
+        globals()[setting] = getattr(args, setting)
+    oscList = ['osc_'+osc if not osc.startswith('osc_') else osc for osc in args.osc]
+    chords = altChords if altChordsFlag == 1 else mainChords
+    if args.chords:
+        chords = [chord for chord in chords if chord[0].strip() in args.chords]
+    if args.benchmark or args.benchmark_baseline:
+        if args.benchmark_baseline:
+            with open(args.benchmark_baseline) as baselineFile:
+                if benchmark_regressions(json.load(baselineFile), args.benchmark_tolerance, args.benchmark):
+                    sys.exit(1)
+        else:
+            run_benchmarks(args.benchmark)
+    elif args.sweep_rates or args.sweep_f0:
+        sweep_settings(args.sweep_rates or [SAMPLE_RATE], args.sweep_f0 or [F0])
+    elif args.profile or args.cprofile:
+        profile_run(args.profile, args.cprofile)
+    elif args.preview:
+        pipe_preview(oscList[0], args.preview, args.preview_seconds)
+    elif args.watch is not None:
+        watch(args.watch or None, args.port)
+    elif args.plan is not None:
+        dry_run([get_oscillator(osc) for osc in oscList], args.plan or None)
+    elif args.verify is not None:
+        if verify_tree(processes=workerProcesses, jsonPath=args.verify or None):
+            sys.exit(1)
+    else:
+        generate_banks()
+
+
+if __name__ == '__main__':
+    main()